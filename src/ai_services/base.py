@@ -8,26 +8,28 @@ Simplified for embedded device compatibility.
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import AsyncIterator, Optional, Dict, Any
+from typing import AsyncIterator, Optional, Dict, Any, Union
 import asyncio
 
 
-@dataclass
+@dataclass(slots=True)
 class AudioRequest:
     """Simplified request object for audio processing."""
     
-    audio_data: bytes  # Raw PCM16 audio data (24kHz, mono, 16-bit)
+    audio_data: Union[bytes, bytearray, memoryview]  # Raw PCM16 audio data (24kHz, mono, 16-bit)
     session_id: str = ""
     device_id: str = ""
+    base64_response: bool = False  # Prefer responses as base64 text when the provider sends it
 
 
-@dataclass 
+@dataclass(slots=True)
 class AudioResponse:
     """Simplified response object containing processed audio."""
     
     audio_data: bytes  # Raw PCM16 audio response (24kHz, mono, 16-bit)
     session_id: str = ""
     chunk_id: int = 0
+    audio_base64: Optional[str] = None  # Set instead of audio_data when base64_response was requested
 
 
 class AIServiceInterface(ABC):
@@ -42,7 +44,6 @@ class AIServiceInterface(ABC):
     def __init__(self, config: Dict[str, Any]):
         """Initialize the AI service with configuration."""
         self.config = config
-        self._session_cache: Dict[str, Any] = {}
     
     @abstractmethod
     async def initialize(self) -> None:
@@ -6,14 +6,22 @@ Simplified for embedded device compatibility with raw PCM16 audio handling.
 """
 
 import asyncio
-import json
-import base64
+import functools
+import inspect
+import random
+import re
+import sys
 import time
-from typing import AsyncIterator, Dict, Any, Optional
+import weakref
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Any, Optional, Set, Tuple, Union, cast
 
+import orjson
 import websockets
 from loguru import logger
 
+from ..base64_compat import b64decode as _b64decode, b64encode as _b64encode
 from .base import (
     AIServiceInterface, 
     AudioRequest, 
@@ -23,6 +31,261 @@ from .base import (
     AIServiceRateLimitError
 )
 
+# Sessions are keyed by (device_id, session_id)
+SessionKey = Tuple[str, str]
+
+# Constant control messages, serialized once. Sent as text frames.
+_COMMIT_MESSAGE = orjson.dumps({"type": "input_audio_buffer.commit"}).decode()
+_RESPONSE_CREATE_MESSAGE = orjson.dumps({"type": "response.create"}).decode()
+
+# The audio append message is assembled as bytes around the base64 payload,
+# which only contains JSON-safe characters, so the audio is never decoded to str.
+_APPEND_PREFIX = b'{"type":"input_audio_buffer.append","audio":"'
+_APPEND_SUFFIX = b'"}'
+
+# The websockets API is detected once instead of probing it with failing connects.
+# websockets >= 14 (the new asyncio implementation) takes additional_headers and can
+# send bytes as a text frame with send(..., text=True); older versions take
+# extra_headers and need a str for text frames. The new implementation can also
+# return text frames undecoded with recv(decode=False), which skips a UTF-8 decode
+# of every event; orjson and base64 decoding both accept bytes.
+_CONNECT_PARAMETERS = inspect.signature(websockets.connect).parameters
+_SEND_BYTES_AS_TEXT = "additional_headers" in _CONNECT_PARAMETERS
+_RECV_KWARGS: Dict[str, Any] = {"decode": False} if _SEND_BYTES_AS_TEXT else {}
+if _SEND_BYTES_AS_TEXT:
+    _HEADERS_KWARG: Optional[str] = "additional_headers"
+elif "extra_headers" in _CONNECT_PARAMETERS:
+    _HEADERS_KWARG = "extra_headers"
+else:
+    _HEADERS_KWARG = None
+
+
+# Audio delta events make up nearly all server traffic. Their base64 payload is
+# sliced out of the raw text instead of parsing the whole event into a dict.
+_DELTA_EVENT_TYPE = '"type":"response.audio.delta"'
+_DELTA_FIELD = '"delta":"'
+_DELTA_EVENT_TYPE_BYTES = _DELTA_EVENT_TYPE.encode()
+_DELTA_FIELD_BYTES = _DELTA_FIELD.encode()
+
+
+def _extract_audio_delta_str(message: str) -> Optional[str]:
+    """
+    Return the base64 delta of a response.audio.delta event without a full parse.
+    
+    Returns None for any other event, or when the delta cannot be sliced out
+    safely, in which case the caller parses the message normally.
+    """
+    if _DELTA_EVENT_TYPE not in message:
+        return None
+    
+    start = message.find(_DELTA_FIELD)
+    if start < 0:
+        return None
+    start += len(_DELTA_FIELD)
+    end = message.find('"', start)
+    if end < 0:
+        return None
+    
+    delta = message[start:end]
+    if "\\" in delta:  # Escaped characters need a real JSON parse
+        return None
+    return delta
+
+
+def _extract_audio_delta_bytes(message: bytes) -> Optional[bytes]:
+    """Bytes counterpart of ``_extract_audio_delta_str`` for undecoded frames."""
+    if _DELTA_EVENT_TYPE_BYTES not in message:
+        return None
+    
+    start = message.find(_DELTA_FIELD_BYTES)
+    if start < 0:
+        return None
+    start += len(_DELTA_FIELD_BYTES)
+    end = message.find(b'"', start)
+    if end < 0:
+        return None
+    
+    delta = message[start:end]
+    if b"\\" in delta:  # Escaped characters need a real JSON parse
+        return None
+    return delta
+
+
+def _check_session_created(message: Union[str, bytes]) -> None:
+    """Raise unless the message is the session.created event."""
+    data = orjson.loads(message)
+    if data.get("type") != "session.created":
+        raise AIServiceProcessingError(f"Failed to create session: {data}")
+
+
+# Error messages caused by the client's audio, logged as warnings instead of errors
+_CLIENT_AUDIO_ERROR = re.compile(r"Invalid 'audio'|buffer too small")
+
+
+@functools.lru_cache(maxsize=64)
+def _encoded_session_config(voice: str, instructions: str) -> str:
+    """Build and serialize the session.update message for a voice/instructions pair."""
+    return orjson.dumps({
+        "type": "session.update",
+        "session": {
+            "modalities": ["text", "audio"],
+            "instructions": instructions,
+            "voice": voice,
+            "input_audio_format": "pcm16",
+            "output_audio_format": "pcm16",
+            "input_audio_transcription": {
+                "model": "whisper-1"
+            }
+        }
+    }).decode()
+
+
+@functools.lru_cache(maxsize=64)
+def _encoded_health_check_config(voice: str, instructions: str) -> str:
+    """Build and serialize the minimal session.update sent by health checks."""
+    return orjson.dumps({
+        "type": "session.update",
+        "session": {
+            "modalities": ["text", "audio"],
+            "instructions": instructions,
+            "voice": voice
+        }
+    }).decode()
+
+
+@dataclass(slots=True)
+class RealtimeSession:
+    """An OpenAI Realtime connection bound to one device session."""
+    
+    websocket: Any
+    device_id: str
+    session_id: str
+    created_at: float = field(default_factory=time.monotonic)  # Monotonic, not wall-clock time
+    handshake_pending: bool = False  # session.created not read yet, see _initialize_session
+
+
+class RealtimeConnectionPool:
+    """
+    Pre-warmed OpenAI Realtime connections, each handed to exactly one new session.
+    
+    Connections are never returned to the pool: a Realtime connection carries
+    conversation state that cannot be reset, so reusing one for another session
+    would leak context between devices.
+    """
+    
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[Any]],
+        size: int = 2,
+        max_age: float = 1500.0,
+        retry_base_delay: float = 1.0,
+        retry_max_delay: float = 60.0
+    ):
+        """
+        Initialize the pool.
+        
+        Args:
+            connect: Coroutine function returning a connection ready for use
+            size: Number of idle connections to keep warm
+            max_age: Seconds after which an idle connection is no longer handed out
+            retry_base_delay: Seconds refill waits after the first failed warm
+            retry_max_delay: Upper bound of the doubling wait after further failures
+        """
+        self.connect = connect
+        self.size = size
+        self.max_age = max_age
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        
+        self._idle: Deque[Tuple[float, Any]] = deque()
+        self._warming = 0
+        # Warms that failed since the last success, and when refill may try again
+        self._failures = 0
+        self._retry_at = 0.0
+        self._warm_tasks: Set[asyncio.Task] = set()
+        self._close_tasks: Set[asyncio.Task] = set()
+    
+    def take(self) -> Optional[Tuple[float, Any]]:
+        """Return (created_at, connection) for a usable idle connection, if any."""
+        oldest_allowed = time.monotonic() - self.max_age
+        while self._idle:
+            created_at, websocket = self._idle.popleft()
+            if websocket.close_code is not None:  # None means connection is still open
+                continue
+            if created_at < oldest_allowed:
+                self.retire(websocket)
+                continue
+            return created_at, websocket
+        return None
+    
+    def refill(self) -> None:
+        """
+        Start warming connections until the pool is back to its size.
+        
+        After a failed warm only one connection is tried at a time, and not before
+        the backoff has passed, so an outage does not multiply failing handshakes.
+        """
+        count = self.size - len(self._idle) - self._warming
+        if self._failures:
+            if self._warming or time.monotonic() < self._retry_at:
+                return
+            count = min(count, 1)
+        
+        for _ in range(count):
+            self._warming += 1
+            self._spawn(self._warm(), self._warm_tasks)
+    
+    async def prime(self) -> bool:
+        """Open one connection now and add it to the pool. Returns False on failure."""
+        self._warming += 1
+        return await self._warm()
+    
+    def retire(self, websocket: Any) -> None:
+        """Close a connection in the background."""
+        if websocket.close_code is None:
+            self._spawn(websocket.close(), self._close_tasks)
+    
+    async def close(self) -> None:
+        """Stop warming connections, close the idle ones and finish retired closes."""
+        for task in list(self._warm_tasks):
+            task.cancel()
+        
+        idle = [websocket for _, websocket in self._idle]
+        self._idle.clear()
+        await asyncio.gather(
+            *self._warm_tasks,
+            *self._close_tasks,
+            *(websocket.close() for websocket in idle if websocket.close_code is None),
+            return_exceptions=True
+        )
+    
+    @staticmethod
+    def _spawn(coro: Awaitable[Any], tasks: Set[asyncio.Task]) -> None:
+        """Run a background task, keeping a reference in tasks until it finishes."""
+        task = asyncio.ensure_future(coro)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    
+    async def _warm(self) -> bool:
+        """Open one connection and add it to the pool."""
+        try:
+            websocket = await self.connect()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Not fatal: the next session simply connects on demand
+            self._failures += 1
+            backoff = min(self.retry_base_delay * 2 ** min(self._failures - 1, 16), self.retry_max_delay)
+            self._retry_at = time.monotonic() + backoff
+            logger.warning(f"Failed to pre-warm OpenAI Realtime connection: {e} (next try in {backoff:.0f}s)")
+            return False
+        finally:
+            self._warming -= 1
+        
+        self._failures = 0
+        self._idle.append((time.monotonic(), websocket))
+        return True
+
 
 class OpenAIRealtimeService(AIServiceInterface):
     """
@@ -40,7 +303,51 @@ class OpenAIRealtimeService(AIServiceInterface):
         self.voice = config.get("voice", "alloy")
         self.instructions = config.get("instructions", "You are a helpful AI assistant responding to voice commands from IoT devices.")
         self.websocket: Optional[Any] = None
-        self._active_sessions: Dict[str, Dict[str, Any]] = {}
+        
+        # Connection URL and auth headers, built once
+        self._realtime_url = f"{self.base_url}?model={self.model}"
+        self._headers = (
+            ("Authorization", f"Bearer {self.api_key}"),
+            ("OpenAI-Beta", "realtime=v1")
+        )
+        # Audio is base64 in JSON, so per-message deflate costs CPU on every frame
+        # for little gain; frames from the API are trusted, so skip the size limit.
+        self._connect_kwargs: Dict[str, Any] = {"compression": None, "max_size": None}
+        if _HEADERS_KWARG is None:
+            logger.warning("websockets does not support custom headers - authentication may fail")
+        else:
+            self._connect_kwargs[_HEADERS_KWARG] = self._headers
+        
+        self._active_sessions: Dict[SessionKey, RealtimeSession] = {}
+        # One lock per session key serializes requests on a connection; entries
+        # disappear once no request holds or waits for the lock
+        self._session_locks: "weakref.WeakValueDictionary[SessionKey, asyncio.Lock]" = weakref.WeakValueDictionary()
+        
+        # Connection retry settings (capped exponential backoff with jitter). The cap
+        # stays well below the 30s response timeout, since a request waits out the
+        # retries while holding its session lock and server slot.
+        self.connect_max_attempts = config.get("connect_max_attempts", 3)
+        self.reconnect_base_delay = config.get("reconnect_base_delay", 1.0)
+        self.reconnect_max_delay = config.get("reconnect_max_delay", 8.0)
+        
+        # Connections are replaced once they reach this age, ahead of the
+        # server-side limit on Realtime session duration
+        self.max_session_duration = config.get("max_session_duration", 1500.0)
+        
+        # Pool of connections that already completed the session handshake
+        self.pool_size = config.get("pool_size", 2)
+        self._pool = RealtimeConnectionPool(
+            self._open_initialized_connection,
+            size=self.pool_size,
+            max_age=self.max_session_duration,
+            retry_base_delay=self.reconnect_base_delay
+        )
+        
+        # Audio per input_audio_buffer.append event (0.5 s of 24 kHz PCM16)
+        self.append_chunk_bytes = config.get("append_chunk_bytes", 24000)
+        
+        # Events read ahead of the consumer; a full queue pauses reading the socket
+        self.receive_queue_size = config.get("receive_queue_size", 16)
         
         if not self.api_key:
             raise ValueError("OpenAI API key is required")
@@ -48,19 +355,30 @@ class OpenAIRealtimeService(AIServiceInterface):
     async def initialize(self) -> None:
         """Initialize the OpenAI Realtime service."""
         logger.info("Initializing OpenAI Realtime service")
-        # Test connection
-        await self.health_check()
+        # Warming the first pooled connection doubles as the connectivity check,
+        # instead of a separate health check connection that is thrown away
+        if self.pool_size > 0:
+            if not await self._pool.prime():
+                logger.error("OpenAI Realtime API is not reachable, sessions will connect on demand")
+            self._pool.refill()
+        else:
+            await self.health_check()
         logger.info("OpenAI Realtime service initialized successfully")
     
     async def cleanup(self) -> None:
         """Clean up OpenAI Realtime service resources."""
         logger.info("Cleaning up OpenAI Realtime service")
         
-        # Close all active sessions
-        for session_data in self._active_sessions.values():
-            ws = session_data.get("websocket")
-            if ws and ws.close_code is None:  # None means connection is still open
-                await ws.close()
+        # Close pooled connections and all active sessions concurrently
+        await asyncio.gather(
+            self._pool.close(),
+            *(
+                session.websocket.close()
+                for session in self._active_sessions.values()
+                if session.websocket.close_code is None  # None means connection is still open
+            ),
+            return_exceptions=True
+        )
         
         self._active_sessions.clear()
         logger.info("OpenAI Realtime service cleanup completed")
@@ -80,111 +398,94 @@ class OpenAIRealtimeService(AIServiceInterface):
         """
         session_key = self._create_session_key(audio_request.device_id, audio_request.session_id)
         
-        try:
-            # Get or create session
-            session_data = await self._get_or_create_session(audio_request)
-            websocket = session_data["websocket"]
-            
-            # Send audio data (already PCM16)
-            await self._send_audio_data(websocket, audio_request.audio_data)
-            
-            # Process responses
-            chunk_id = 0
-            async for response_chunk in self._receive_audio_responses(websocket, session_key):
-                yield AudioResponse(
-                    audio_data=response_chunk["audio_data"],
-                    session_id=audio_request.session_id,
-                    chunk_id=chunk_id
-                )
-                chunk_id += 1
+        # Requests for one session share a connection and must not interleave their
+        # events; the lock queues them in arrival order
+        lock = self._session_locks.get(session_key)
+        if lock is None:
+            lock = self._session_locks[session_key] = asyncio.Lock()
+        
+        async with lock:
+            try:
+                # Get or create session
+                session = await self._get_or_create_session(audio_request, session_key)
+                websocket = session.websocket
                 
-        except Exception as e:
-            logger.error(f"WebSocket connection error: {e}")
-            # Remove failed session
-            self._active_sessions.pop(session_key, None)
-            if "Connection" in str(e):
-                raise AIServiceConnectionError(f"Connection lost: {e}")
-            else:
-                raise AIServiceProcessingError(f"Processing failed: {e}")
+                # Send audio data (already PCM16)
+                try:
+                    await self._send_audio_data(websocket, audio_request.audio_data)
+                except websockets.exceptions.ConnectionClosed:
+                    # The connection closed after the liveness check; retry once on a new one
+                    logger.info(
+                        f"OpenAI Realtime connection closed, reopening session for "
+                        f"{audio_request.device_id}:{audio_request.session_id}"
+                    )
+                    self._active_sessions.pop(session_key, None)
+                    session = await self._get_or_create_session(audio_request, session_key)
+                    websocket = session.websocket
+                    await self._send_audio_data(websocket, audio_request.audio_data)
+                
+                # Process responses
+                chunk_id = 0
+                base64_response = audio_request.base64_response
+                handshake_pending = session.handshake_pending
+                session.handshake_pending = False
+                async for audio in self._receive_audio_responses(
+                    websocket, session_key, base64_response, handshake_pending
+                ):
+                    if isinstance(audio, str):
+                        # Forward the delta as sent by the API, skipping decode + re-encode
+                        yield AudioResponse(
+                            audio_data=b"",
+                            session_id=audio_request.session_id,
+                            chunk_id=chunk_id,
+                            audio_base64=audio
+                        )
+                    else:
+                        yield AudioResponse(
+                            audio_data=audio,
+                            session_id=audio_request.session_id,
+                            chunk_id=chunk_id
+                        )
+                    chunk_id += 1
+                    
+            except Exception as e:
+                logger.error(f"WebSocket connection error: {e}")
+                # Remove failed session
+                self._active_sessions.pop(session_key, None)
+                if "Connection" in str(e):
+                    raise AIServiceConnectionError(f"Connection lost: {e}")
+                else:
+                    raise AIServiceProcessingError(f"Processing failed: {e}")
     
     async def health_check(self) -> bool:
         """Check if OpenAI Realtime API is accessible."""
         try:
-            # Use the configured base URL from environment
-            realtime_url = f"{self.base_url}?model={self.model}"
-            
-            # Try different connection approaches for compatibility
-            websocket = None
-            
-            # Method 1: Try with additional_headers (newer websockets)
-            try:
-                headers = [
-                    ("Authorization", f"Bearer {self.api_key}"),
-                    ("OpenAI-Beta", "realtime=v1")
-                ]
-                websocket = await websockets.connect(realtime_url, additional_headers=headers)
-                logger.info("Connected with additional_headers")
-            except (TypeError, AttributeError, Exception) as e:
-                logger.debug(f"additional_headers method failed: {e}")
-                
-            # Method 2: Try with extra_headers (some versions)
-            if not websocket:
-                try:
-                    headers = {
-                        "Authorization": f"Bearer {self.api_key}",
-                        "OpenAI-Beta": "realtime=v1"
-                    }
-                    websocket = await websockets.connect(realtime_url, extra_headers=headers)
-                    logger.info("Connected with extra_headers")
-                except (TypeError, AttributeError, Exception) as e:
-                    logger.debug(f"extra_headers method failed: {e}")
-            
-            # Method 3: Basic connection without custom headers
-            if not websocket:
-                try:
-                    logger.warning("Trying basic connection - authentication may fail")
-                    websocket = await websockets.connect(realtime_url)
-                    logger.info("Connected with basic method")
-                except Exception as e:
-                    logger.error(f"Basic connection failed: {e}")
-                    return False
-            
-            # Test the connection
-            if websocket:
-                try:
-                    result = await self._test_websocket_connection(websocket)
-                    await websocket.close()
-                    return result
-                except Exception as e:
-                    logger.error(f"Connection test failed: {e}")
-                    try:
-                        await websocket.close()
-                    except Exception:
-                        pass  # Ignore close errors
-                    return False
-            
+            websocket = await self._open_websocket()
+        except AIServiceConnectionError as e:
+            logger.error(f"Health check failed: {e}")
             return False
-                
+        
+        # Test the connection
+        try:
+            return await self._test_websocket_connection(websocket)
         except Exception as e:
-            logger.error(f"Health check failed: {e}")
+            logger.error(f"Connection test failed: {e}")
             return False
+        finally:
+            try:
+                await websocket.close()
+            except Exception:
+                pass  # Ignore close errors
     
     async def _test_websocket_connection(self, websocket: Any) -> bool:
         """Test WebSocket connection by sending a session update."""
         try:
             # Send a simple session update
-            await websocket.send(json.dumps({
-                "type": "session.update",
-                "session": {
-                    "modalities": ["text", "audio"],
-                    "instructions": self.instructions,
-                    "voice": self.voice
-                }
-            }))
+            await websocket.send(_encoded_health_check_config(self.voice, self.instructions))
             
             # Wait for response
             response = await asyncio.wait_for(websocket.recv(), timeout=5)
-            data = json.loads(response)
+            data = orjson.loads(response)
             
             return data.get("type") == "session.created"
         except Exception as e:
@@ -201,188 +502,287 @@ class OpenAIRealtimeService(AIServiceInterface):
             "real_time_translation": False,
         }
     
-    def _create_session_key(self, device_id: str, session_id: str) -> str:
+    def _create_session_key(self, device_id: str, session_id: str) -> SessionKey:
         """Create a unique session key for caching."""
-        return f"{device_id}:{session_id}"
+        # Interned so lookups of a repeated key compare by identity
+        return (sys.intern(device_id), sys.intern(session_id))
     
-    async def _get_or_create_session(self, audio_request: AudioRequest) -> Dict[str, Any]:
+    async def _get_or_create_session(
+        self,
+        audio_request: AudioRequest,
+        session_key: SessionKey
+    ) -> RealtimeSession:
         """Get existing session or create a new one."""
-        session_key = self._create_session_key(audio_request.device_id, audio_request.session_id)
+        session = self._active_sessions.get(session_key)
+        # Check if connection is still alive
+        if session is not None and session.websocket.close_code is None:  # None means connection is still open
+            if time.monotonic() - session.created_at < self.max_session_duration:
+                return session
+            # Replace it before the server ends the session mid-response
+            self._pool.retire(session.websocket)
         
-        if session_key in self._active_sessions:
-            session_data = self._active_sessions[session_key]
-            # Check if connection is still alive
-            if session_data["websocket"].close_code is None:  # None means connection is still open
-                return session_data
+        # Create new session, preferring an already initialized connection
+        logger.info(
+            f"Creating new OpenAI Realtime session for "
+            f"{audio_request.device_id}:{audio_request.session_id}"
+        )
+        pooled = self._pool.take()
+        if pooled is not None:
+            created_at, websocket = pooled
+        else:
+            created_at = time.monotonic()
+            websocket = await self._create_websocket_connection()
+            
+            # Initialize session without waiting a round trip for session.created;
+            # the audio is sent right behind session.update
+            try:
+                await self._initialize_session(websocket, wait=False)
+            except BaseException:
+                await websocket.close()
+                raise
         
-        # Create new session
-        logger.info(f"Creating new OpenAI Realtime session for {session_key}")
-        websocket = await self._create_websocket_connection()
+        self._pool.refill()
         
-        # Initialize session
-        await self._initialize_session(websocket)
+        session = RealtimeSession(
+            websocket=websocket,
+            device_id=audio_request.device_id,
+            session_id=audio_request.session_id,
+            created_at=created_at,
+            handshake_pending=pooled is None
+        )
         
-        session_data = {
-            "websocket": websocket,
-            "created_at": time.time(),
-            "device_id": audio_request.device_id,
-            "session_id": audio_request.session_id
-        }
-        
-        self._active_sessions[session_key] = session_data
-        return session_data
+        self._active_sessions[session_key] = session
+        return session
+    
+    async def _open_initialized_connection(self) -> Any:
+        """Open a connection and complete the session handshake, for the pool."""
+        websocket = await self._open_websocket()
+        try:
+            await self._initialize_session(websocket)
+        except BaseException:
+            await websocket.close()
+            raise
+        return websocket
     
     async def _create_websocket_connection(self) -> Any:
-        """Create a new WebSocket connection to OpenAI Realtime API."""
-        # Use the configured base URL from environment
-        realtime_url = f"{self.base_url}?model={self.model}"
+        """
+        Create a new WebSocket connection to OpenAI Realtime API.
         
-        # Try different connection approaches for compatibility
-        websocket = None
-        connection_error = None
+        Failed attempts are retried with capped exponential backoff plus jitter.
+        The delay depends only on this call's attempt number, so concurrent or
+        earlier failing requests do not lengthen it.
+        """
+        last_error: Optional[Exception] = None
         
-        # Method 1: Try with additional_headers (newer websockets)
-        try:
-            headers = [
-                ("Authorization", f"Bearer {self.api_key}"),
-                ("OpenAI-Beta", "realtime=v1")
-            ]
-            websocket = await websockets.connect(realtime_url, additional_headers=headers)
-            logger.debug("Connected with additional_headers")
-            return websocket
-        except (TypeError, AttributeError, Exception) as e:
-            connection_error = e
-            logger.debug(f"additional_headers method failed: {e}")
+        for attempt in range(self.connect_max_attempts):
+            if attempt:
+                backoff = min(self.reconnect_base_delay * 2 ** (attempt - 1), self.reconnect_max_delay)
+                delay = backoff + random.uniform(0, self.reconnect_base_delay)
+                logger.warning(
+                    f"Retrying OpenAI Realtime connection in {delay:.1f}s "
+                    f"(attempt {attempt + 1}/{self.connect_max_attempts})"
+                )
+                await asyncio.sleep(delay)
+            
+            try:
+                websocket = await self._open_websocket()
+            except AIServiceConnectionError as e:
+                last_error = e
+                continue
             
-        # Method 2: Try with extra_headers (some versions)
-        try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "OpenAI-Beta": "realtime=v1"
-            }
-            websocket = await websockets.connect(realtime_url, extra_headers=headers)
-            logger.debug("Connected with extra_headers")
             return websocket
-        except (TypeError, AttributeError, Exception) as e:
-            connection_error = e
-            logger.debug(f"extra_headers method failed: {e}")
         
-        # Method 3: Basic connection without custom headers (will likely fail auth)
+        raise AIServiceConnectionError(
+            f"Failed to connect after {self.connect_max_attempts} attempts: {last_error}"
+        )
+    
+    async def _open_websocket(self) -> Any:
+        """Open a single WebSocket connection to OpenAI Realtime API."""
         try:
-            logger.warning("Using basic connection - authentication may fail")
-            websocket = await websockets.connect(realtime_url)
-            logger.debug("Connected with basic method")
-            return websocket
+            return await websockets.connect(self._realtime_url, **self._connect_kwargs)
         except Exception as e:
-            connection_error = e
-            logger.error(f"All connection methods failed. Last error: {e}")
-            
-        raise AIServiceConnectionError(f"Failed to create WebSocket connection: {connection_error}")
-    
-    async def _initialize_session(self, websocket: Any) -> None:
-        """Initialize the OpenAI Realtime session."""
-        session_config = {
-            "type": "session.update",
-            "session": {
-                "modalities": ["text", "audio"],
-                "instructions": self.instructions,
-                "voice": self.voice,
-                "input_audio_format": "pcm16",
-                "output_audio_format": "pcm16",
-                "input_audio_transcription": {
-                    "model": "whisper-1"
-                }
-            }
-        }
+            raise AIServiceConnectionError(f"Failed to create WebSocket connection: {e}")
+    
+    async def _initialize_session(self, websocket: Any, wait: bool = True) -> None:
+        """
+        Initialize the OpenAI Realtime session.
         
-        await websocket.send(json.dumps(session_config))
+        With wait=False only session.update is sent, and the session.created
+        event is left for the first response reader to check.
+        """
+        await websocket.send(_encoded_session_config(self.voice, self.instructions))
+        if not wait:
+            return
         
         # Wait for session.created response
         response = await asyncio.wait_for(websocket.recv(), timeout=10)
-        data = json.loads(response)
-        
-        if data.get("type") != "session.created":
-            raise AIServiceProcessingError(f"Failed to create session: {data}")
+        _check_session_created(response)
     
-    async def _send_audio_data(self, websocket: Any, audio_data: bytes) -> None:
+    async def _send_audio_data(
+        self,
+        websocket: Any,
+        audio_data: Union[bytes, bytearray, memoryview]
+    ) -> None:
         """Send raw PCM16 audio data to the OpenAI Realtime API."""
         try:
             # Validate audio data
             if not audio_data:
                 raise AIServiceProcessingError("Audio data is empty or invalid")
             
-            # Send audio data (already PCM16)
-            try:
-                audio_b64 = base64.b64encode(audio_data).decode()
-            except Exception as e:
-                raise AIServiceProcessingError(f"Failed to encode audio data: {e}")
-            
-            audio_message = {
-                "type": "input_audio_buffer.append",
-                "audio": audio_b64
-            }
-            
-            await websocket.send(json.dumps(audio_message))
-            
-            # Commit the audio buffer
-            await websocket.send(json.dumps({
-                "type": "input_audio_buffer.commit"
-            }))
+            # Send audio data (already PCM16). Long audio goes out as several
+            # appends, so earlier slices are on the wire while later ones are
+            # encoded and no single event grows with the request size.
+            audio = memoryview(audio_data)
+            step = self.append_chunk_bytes
+            last_offset = (len(audio) - 1) // step * step
+            for offset in range(0, last_offset, step):
+                await self._send_append(websocket, audio[offset:offset + step])
             
-            # Request response generation
-            await websocket.send(json.dumps({
-                "type": "response.create"
-            }))
-        except AIServiceProcessingError:
-            # Re-raise AI service errors
+            # Append the last slice, commit the buffer and request response generation.
+            # Each send writes its frame before it first suspends, so gather keeps
+            # the order while queueing all three without draining in between.
+            await asyncio.gather(
+                self._send_append(websocket, audio[last_offset:]),
+                websocket.send(_COMMIT_MESSAGE),
+                websocket.send(_RESPONSE_CREATE_MESSAGE)
+            )
+        except (AIServiceProcessingError, websockets.exceptions.ConnectionClosed):
+            # Re-raise AI service errors and let the caller handle closed connections
             raise
         except Exception as e:
             logger.error(f"Error sending audio data: {e}")
             raise AIServiceProcessingError(f"Failed to send audio data: {e}")
     
+    def _send_append(self, websocket: Any, audio: memoryview) -> Awaitable[None]:
+        """Encode one input_audio_buffer.append message and return its send."""
+        try:
+            message = _APPEND_PREFIX + _b64encode(audio) + _APPEND_SUFFIX
+        except Exception as e:
+            raise AIServiceProcessingError(f"Failed to encode audio data: {e}")
+        
+        if _SEND_BYTES_AS_TEXT:
+            return cast(Awaitable[None], websocket.send(message, text=True))
+        return cast(Awaitable[None], websocket.send(message.decode()))
+    
     async def _receive_audio_responses(
         self, 
         websocket: Any,
-        session_key: str
-    ) -> AsyncIterator[Dict[str, Any]]:
-        """Receive and process audio responses from OpenAI Realtime API."""
+        session_key: SessionKey,
+        base64_response: bool = False,
+        handshake_pending: bool = False
+    ) -> AsyncIterator[Union[bytes, str]]:
+        """
+        Receive PCM16 audio chunks from OpenAI Realtime API.
+        
+        Chunks are decoded bytes, or the base64 text as sent by the API when
+        base64_response is set. With handshake_pending the first event must be
+        session.created.
+        """
+        # A reader task drains the socket into a bounded queue so receiving is
+        # decoupled from how fast the caller consumes the yielded chunks.
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.receive_queue_size)
+        response_done = asyncio.Event()
+        reader = asyncio.create_task(
+            self._drain_responses(websocket, queue, response_done, handshake_pending)
+        )
+        
+        loop = asyncio.get_running_loop()
+        
         try:
+            # One timeout for the whole response, rearmed around each wait instead
+            # of a wait_for() task per event. It is disarmed while the caller
+            # holds a yielded chunk so a slow consumer is not timed out.
+            async with asyncio.timeout(None) as deadline:
+                while True:
+                    deadline.reschedule(loop.time() + 30)
+                    data = await queue.get()
+                    deadline.reschedule(None)
+                    if data is None:
+                        # Response completed
+                        break
+                    if isinstance(data, Exception):
+                        raise data
+                    if isinstance(data, (str, bytes)):
+                        # Base64 audio from the audio delta fast path
+                        if data:
+                            if base64_response:
+                                yield data if isinstance(data, str) else data.decode("ascii")
+                            else:
+                                yield _b64decode(data)
+                        continue
+                    
+                    message_type = data.get("type")
+                    
+                    if message_type == "response.audio.delta":
+                        # Audio chunk received (already PCM16)
+                        audio_base64 = data.get("delta", "")
+                        if audio_base64:
+                            yield audio_base64 if base64_response else _b64decode(audio_base64)
+                    
+                    elif message_type == "error":
+                        error_msg = data.get("error", {}).get("message", "Unknown error")
+                        # Treat invalid client audio errors as warnings
+                        if _CLIENT_AUDIO_ERROR.search(error_msg):
+                            logger.warning(f"OpenAI Realtime API client error: {error_msg}")
+                        else:
+                            logger.error(f"OpenAI Realtime API error: {error_msg}")
+                        raise AIServiceProcessingError(f"API error: {error_msg}")
+                    
+        except asyncio.TimeoutError:
+            session_name = ":".join(session_key)
+            logger.warning(f"Timeout waiting for response in session {session_name}")
+            raise AIServiceProcessingError(f"Timeout waiting for response in session {session_name}")
+        except AIServiceProcessingError:
+            # Re-raise AI service errors to propagate to client
+            raise
+        except Exception as e:
+            session_name = ":".join(session_key)
+            logger.error(f"Unexpected error in WebSocket communication for session {session_name}: {e}")
+            raise AIServiceProcessingError(f"WebSocket communication error: {e}")
+        finally:
+            reader.cancel()
+            if not response_done.is_set():
+                # Frames of the unfinished response would leak into the next
+                # request on this connection, so drop the session instead.
+                session = self._active_sessions.pop(session_key, None)
+                if session is not None:
+                    await session.websocket.close()
+    
+    async def _drain_responses(
+        self,
+        websocket: Any,
+        queue: asyncio.Queue,
+        response_done: asyncio.Event,
+        handshake_pending: bool = False
+    ) -> None:
+        """Read server events into the queue until the response is done or fails."""
+        try:
+            if handshake_pending:
+                _check_session_created(await websocket.recv(**_RECV_KWARGS))
+            
             while True:
-                message = await asyncio.wait_for(websocket.recv(), timeout=30)
-                data = json.loads(message)
+                message = await websocket.recv(**_RECV_KWARGS)
+                audio_base64: Optional[Union[str, bytes]]
+                if isinstance(message, bytes):
+                    audio_base64 = _extract_audio_delta_bytes(message)
+                else:
+                    audio_base64 = _extract_audio_delta_str(message)
+                if audio_base64 is not None:
+                    await queue.put(audio_base64)
+                    continue
                 
+                data = orjson.loads(message)
                 message_type = data.get("type")
                 
-                if message_type == "response.audio.delta":
-                    # Audio chunk received (already PCM16)
-                    audio_base64 = data.get("delta", "")
-                    if audio_base64:
-                        audio_data = base64.b64decode(audio_base64)
-                        
-                        yield {
-                            "audio_data": audio_data,
-                            "metadata": {"type": "audio_delta"}
-                        }
+                if message_type == "response.done":
+                    response_done.set()
+                    await queue.put(None)
+                    return
                 
-                elif message_type == "response.done":
-                    # Response completed
-                    break
-                
-                elif message_type == "error":
-                    error_msg = data.get("error", {}).get("message", "Unknown error")
-                    # Treat invalid client audio errors as warnings
-                    if "Invalid 'audio'" in error_msg or "buffer too small" in error_msg:
-                        logger.warning(f"OpenAI Realtime API client error: {error_msg}")
-                    else:
-                        logger.error(f"OpenAI Realtime API error: {error_msg}")
-                    raise AIServiceProcessingError(f"API error: {error_msg}")
-                    
-        except asyncio.TimeoutError:
-            logger.warning(f"Timeout waiting for response in session {session_key}")
-            raise AIServiceProcessingError(f"Timeout waiting for response in session {session_key}")
-        except AIServiceProcessingError:
-            # Re-raise AI service errors to propagate to client
+                await queue.put(data)
+                if message_type == "error":
+                    return
+        except asyncio.CancelledError:
             raise
         except Exception as e:
-            logger.error(f"Unexpected error in WebSocket communication for session {session_key}: {e}")
-            raise AIServiceProcessingError(f"WebSocket communication error: {e}") 
\ No newline at end of file
+            await queue.put(e)
\ No newline at end of file
@@ -0,0 +1,24 @@
+"""
+Base64 helpers for audio payloads.
+
+Uses SIMD-accelerated pybase64 when it is installed (the "speedups" extra)
+and falls back to the standard library otherwise.
+"""
+
+from binascii import a2b_base64, b2a_base64
+from typing import Union
+
+try:
+    from pybase64 import b64decode, b64encode, b64encode_as_string
+except ImportError:
+    def b64decode(data: Union[str, bytes, bytearray, memoryview]) -> bytes:
+        """Decode base64 text into raw bytes."""
+        return a2b_base64(data)
+    
+    def b64encode(data: Union[bytes, bytearray, memoryview]) -> bytes:
+        """Encode raw bytes as base64, without a trailing newline."""
+        return b2a_base64(data, newline=False)
+    
+    def b64encode_as_string(data: Union[bytes, bytearray, memoryview]) -> str:
+        """Encode raw bytes as a base64 string."""
+        return b2a_base64(data, newline=False).decode()
\ No newline at end of file
@@ -24,6 +24,8 @@ class MQTTConfig:
     request_topic: str = "iot/+/audio_request"
     response_topic: str = "iot/{device_id}/audio_response"
     health_topic: str = "iot/server/health"
+    max_inflight: int = 200
+    max_queued: int = 10000
 
 
 @dataclass
@@ -35,6 +37,8 @@ class OpenAIConfig:
     base_url: str = "wss://api.openai.com/v1/realtime"
     voice: str = "alloy"
     instructions: str = "You are a helpful AI assistant responding to voice commands from IoT devices."
+    pool_size: int = 2
+    max_session_duration: int = 1500
 
 
 @dataclass
@@ -46,6 +50,10 @@ class ServerConfig:
     log_level: str = "INFO"
     enable_health_checks: bool = True
     health_check_interval: int = 30
+    stats_log_interval: int = 60
+    stream_qos: int = 0
+    max_batch_size: int = 0
+    max_batch_delay_ms: int = 0
 
 
 @dataclass
@@ -66,43 +74,58 @@ class Config:
         else:
             load_dotenv()  # Load from default .env file
         
+        # Read through one local mapping instead of a module lookup per setting
+        env = os.environ
+        
         # MQTT configuration
         mqtt_config = MQTTConfig(
-            host=os.getenv("MQTT_HOST", "localhost"),
-            port=int(os.getenv("MQTT_PORT", "1883")),
-            username=os.getenv("MQTT_USERNAME"),
-            password=os.getenv("MQTT_PASSWORD"),
-            client_id=os.getenv("MQTT_CLIENT_ID", "mqtt-ai-server"),
-            use_tls=os.getenv("MQTT_USE_TLS", "false").lower() == "true",
-            keepalive=int(os.getenv("MQTT_KEEPALIVE", "60")),
-            request_topic=os.getenv("MQTT_REQUEST_TOPIC", "iot/+/audio_request"),
-            response_topic=os.getenv("MQTT_RESPONSE_TOPIC", "iot/{device_id}/audio_response"),
-            health_topic=os.getenv("MQTT_HEALTH_TOPIC", "iot/server/health")
+            host=env.get("MQTT_HOST", "localhost"),
+            port=int(env.get("MQTT_PORT", "1883")),
+            username=env.get("MQTT_USERNAME"),
+            password=env.get("MQTT_PASSWORD"),
+            client_id=env.get("MQTT_CLIENT_ID", "mqtt-ai-server"),
+            use_tls=env.get("MQTT_USE_TLS", "false").lower() == "true",
+            keepalive=int(env.get("MQTT_KEEPALIVE", "60")),
+            request_topic=env.get("MQTT_REQUEST_TOPIC", "iot/+/audio_request"),
+            response_topic=env.get("MQTT_RESPONSE_TOPIC", "iot/{device_id}/audio_response"),
+            health_topic=env.get("MQTT_HEALTH_TOPIC", "iot/server/health"),
+            max_inflight=int(env.get("MQTT_MAX_INFLIGHT", "200")),
+            max_queued=int(env.get("MQTT_MAX_QUEUED", "10000"))
         )
         
         # OpenAI configuration
-        openai_api_key = os.getenv("OPENAI_API_KEY")
+        openai_api_key = env.get("OPENAI_API_KEY")
         if not openai_api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
         
         openai_config = OpenAIConfig(
             api_key=openai_api_key,
-            model=os.getenv("OPENAI_MODEL", "gpt-4o-realtime-preview"),
-            base_url=os.getenv("OPENAI_BASE_URL", "wss://api.openai.com/v1/realtime"),
-            voice=os.getenv("OPENAI_VOICE", "alloy"),
-            instructions=os.getenv(
+            model=env.get("OPENAI_MODEL", "gpt-4o-realtime-preview"),
+            base_url=env.get("OPENAI_BASE_URL", "wss://api.openai.com/v1/realtime"),
+            voice=env.get("OPENAI_VOICE", "alloy"),
+            instructions=env.get(
                 "OPENAI_INSTRUCTIONS", 
                 "You are a helpful AI assistant responding to voice commands from IoT devices."
-            )
+            ),
+            pool_size=int(env.get("OPENAI_POOL_SIZE", "2")),
+            max_session_duration=int(env.get("OPENAI_MAX_SESSION_DURATION", "1500"))
         )
         
         # Server configuration
+        stream_qos = int(env.get("STREAM_QOS", "0"))
+        if stream_qos not in (0, 1, 2):
+            raise ValueError(f"STREAM_QOS must be 0, 1 or 2, got {stream_qos}")
+        
         server_config = ServerConfig(
-            max_concurrent_sessions=int(os.getenv("MAX_CONCURRENT_SESSIONS", "50")),
-            session_timeout_seconds=int(os.getenv("SESSION_TIMEOUT_SECONDS", "300")),
-            log_level=os.getenv("LOG_LEVEL", "INFO"),
-            enable_health_checks=os.getenv("ENABLE_HEALTH_CHECKS", "true").lower() == "true",
-            health_check_interval=int(os.getenv("HEALTH_CHECK_INTERVAL", "30"))
+            max_concurrent_sessions=int(env.get("MAX_CONCURRENT_SESSIONS", "50")),
+            session_timeout_seconds=int(env.get("SESSION_TIMEOUT_SECONDS", "300")),
+            log_level=env.get("LOG_LEVEL", "INFO"),
+            enable_health_checks=env.get("ENABLE_HEALTH_CHECKS", "true").lower() == "true",
+            health_check_interval=int(env.get("HEALTH_CHECK_INTERVAL", "30")),
+            stats_log_interval=int(env.get("STATS_LOG_INTERVAL", "60")),
+            stream_qos=stream_qos,
+            max_batch_size=int(env.get("MAX_BATCH_SIZE", "0")),
+            max_batch_delay_ms=int(env.get("MAX_BATCH_DELAY_MS", "0"))
         )
         
         return cls(
@@ -124,21 +147,29 @@ class Config:
                 "keepalive": self.mqtt.keepalive,
                 "request_topic": self.mqtt.request_topic,
                 "response_topic": self.mqtt.response_topic,
-                "health_topic": self.mqtt.health_topic
+                "health_topic": self.mqtt.health_topic,
+                "max_inflight": self.mqtt.max_inflight,
+                "max_queued": self.mqtt.max_queued
             },
             "openai": {
                 "api_key": "***",
                 "model": self.openai.model,
                 "base_url": self.openai.base_url,
                 "voice": self.openai.voice,
-                "instructions": self.openai.instructions
+                "instructions": self.openai.instructions,
+                "pool_size": self.openai.pool_size,
+                "max_session_duration": self.openai.max_session_duration
             },
             "server": {
                 "max_concurrent_sessions": self.server.max_concurrent_sessions,
                 "session_timeout_seconds": self.server.session_timeout_seconds,
                 "log_level": self.server.log_level,
                 "enable_health_checks": self.server.enable_health_checks,
-                "health_check_interval": self.server.health_check_interval
+                "health_check_interval": self.server.health_check_interval,
+                "stats_log_interval": self.server.stats_log_interval,
+                "stream_qos": self.server.stream_qos,
+                "max_batch_size": self.server.max_batch_size,
+                "max_batch_delay_ms": self.server.max_batch_delay_ms
             }
         }
 
@@ -156,6 +187,8 @@ MQTT_PASSWORD=
 MQTT_CLIENT_ID=mqtt-ai-server
 MQTT_USE_TLS=false
 MQTT_KEEPALIVE=60
+MQTT_MAX_INFLIGHT=200
+MQTT_MAX_QUEUED=10000
 
 # MQTT Topics
 MQTT_REQUEST_TOPIC=iot/+/audio_request
@@ -168,6 +201,8 @@ OPENAI_MODEL=gpt-4o-realtime-preview
 OPENAI_BASE_URL=wss://api.openai.com/v1/realtime
 OPENAI_VOICE=alloy
 OPENAI_INSTRUCTIONS=You are a helpful AI assistant responding to voice commands from IoT devices.
+OPENAI_POOL_SIZE=2
+OPENAI_MAX_SESSION_DURATION=1500
 
 # Server Settings
 MAX_CONCURRENT_SESSIONS=50
@@ -175,6 +210,10 @@ SESSION_TIMEOUT_SECONDS=300
 LOG_LEVEL=INFO
 ENABLE_HEALTH_CHECKS=true
 HEALTH_CHECK_INTERVAL=30
+STATS_LOG_INTERVAL=60
+STREAM_QOS=0
+MAX_BATCH_SIZE=0
+MAX_BATCH_DELAY_MS=0
 """
     
     with open(filename, "w") as f:
@@ -11,6 +11,11 @@ from pathlib import Path
 
 from loguru import logger
 
+try:
+    import uvloop
+except ImportError:  # Not available on Windows
+    uvloop = None
+
 from .config import Config, create_example_env_file
 from .ai_services import OpenAIRealtimeService
 from .mqtt import MQTTAIServer
@@ -33,6 +38,15 @@ def setup_logging(log_level: str = "INFO") -> None:
     )
 
 
+async def log_stats_periodically(mqtt_server: MQTTAIServer, interval: int) -> None:
+    """Log server statistics at a fixed interval once requests have been processed."""
+    while True:
+        await asyncio.sleep(interval)
+        stats = mqtt_server.get_stats()
+        if stats["message_stats"]["requests_processed"] > 0:
+            logger.debug(f"Server stats: {stats}")
+
+
 async def main_async() -> None:
     """Main entry point for the MQTT AI Agent server."""
     
@@ -47,7 +61,8 @@ async def main_async() -> None:
         setup_logging(config.server.log_level)
         
         logger.info("Configuration loaded successfully")
-        logger.debug(f"Config: {config.to_dict()}")
+        # Only build the config dict when DEBUG is actually enabled
+        logger.opt(lazy=True).debug("Config: {}", config.to_dict)
         
         # Create AI service
         logger.info("Initializing AI service...")
@@ -56,7 +71,9 @@ async def main_async() -> None:
             "model": config.openai.model,
             "base_url": config.openai.base_url,
             "voice": config.openai.voice,
-            "instructions": config.openai.instructions
+            "instructions": config.openai.instructions,
+            "pool_size": config.openai.pool_size,
+            "max_session_duration": config.openai.max_session_duration
         })
         
         # Create MQTT server
@@ -71,14 +88,19 @@ async def main_async() -> None:
             "keepalive": config.mqtt.keepalive,
             "request_topic": config.mqtt.request_topic,
             "response_topic": config.mqtt.response_topic,
-            "health_topic": config.mqtt.health_topic
+            "health_topic": config.mqtt.health_topic,
+            "max_inflight": config.mqtt.max_inflight,
+            "max_queued": config.mqtt.max_queued
         }
         
         server_config = {
             "max_concurrent_sessions": config.server.max_concurrent_sessions,
             "session_timeout_seconds": config.server.session_timeout_seconds,
             "enable_health_checks": config.server.enable_health_checks,
-            "health_check_interval": config.server.health_check_interval
+            "health_check_interval": config.server.health_check_interval,
+            "stream_qos": config.server.stream_qos,
+            "max_batch_size": config.server.max_batch_size,
+            "max_batch_delay_ms": config.server.max_batch_delay_ms
         }
         
         mqtt_server = MQTTAIServer(
@@ -87,31 +109,36 @@ async def main_async() -> None:
             server_config=server_config
         )
         
-        # Setup signal handlers for graceful shutdown
-        def signal_handler(signum: int, frame) -> None:
+        # Setup signal handlers for graceful shutdown. The event loop runs them as
+        # regular callbacks; they only end the wait below, and leaving
+        # run_context() then stops the server exactly once.
+        loop = asyncio.get_running_loop()
+        
+        def signal_handler(signum: int) -> None:
             logger.info(f"Received signal {signum}, initiating graceful shutdown...")
-            asyncio.create_task(mqtt_server.stop())
+            mqtt_server.request_stop()
         
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, signal_handler, signum)
+            except NotImplementedError:  # Not supported by Windows event loops
+                signal.signal(signum, lambda signum, frame: loop.call_soon_threadsafe(signal_handler, signum))
         
         # Start server
         logger.info("Starting MQTT AI server...")
         async with mqtt_server.run_context():
             logger.info("MQTT AI Agent Server is running. Press Ctrl+C to stop.")
             
-            # Keep the server running
+            # Keep the server running until it is stopped
+            stats_task = asyncio.create_task(
+                log_stats_periodically(mqtt_server, config.server.stats_log_interval)
+            )
             try:
-                while mqtt_server._running:
-                    await asyncio.sleep(1)
-                    
-                    # Log statistics periodically
-                    stats = mqtt_server.get_stats()
-                    if stats["message_stats"]["requests_processed"] > 0:
-                        logger.debug(f"Server stats: {stats}")
-                        
+                await mqtt_server.wait_until_stopped()
             except asyncio.CancelledError:
                 logger.info("Server shutdown requested")
+            finally:
+                stats_task.cancel()
         
         logger.info("MQTT AI Agent Server stopped gracefully")
         
@@ -147,9 +174,11 @@ def main() -> None:
         create_env_example()
         sys.exit(0)
     
-    # Run the server
+    # Run the server, on uvloop when available
+    loop_factory = uvloop.new_event_loop if uvloop else None
     try:
-        asyncio.run(main_async())
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            runner.run(main_async())
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
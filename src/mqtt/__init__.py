@@ -4,7 +4,8 @@ MQTT package
 Contains MQTT client implementation and message handling.
 """
 
+from .asyncio_loop import AsyncioMQTTLoop
 from .client import MQTTAIServer
 from .messages import AudioMessage, MessageType
 
-__all__ = ["MQTTAIServer", "AudioMessage", "MessageType"] 
\ No newline at end of file
+__all__ = ["AsyncioMQTTLoop", "MQTTAIServer", "AudioMessage", "MessageType"] 
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+asyncio integration for paho-mqtt.
+
+This module drives a paho-mqtt client's socket directly from an asyncio event loop
+instead of the background network thread started by ``loop_start()``.
+All paho callbacks therefore run on the event loop thread.
+"""
+
+import asyncio
+import socket
+from typing import Any, Optional
+
+import paho.mqtt.client as mqtt
+from loguru import logger
+
+
+class AsyncioMQTTLoop:
+    """
+    Attach a paho-mqtt client to an asyncio event loop.
+
+    The client's socket is registered with ``loop.add_reader``/``loop.add_writer``
+    and ``loop_misc()`` (keepalive, reconnect) runs in a small periodic task.
+    Must be created before calling ``client.connect()``.
+    """
+
+    def __init__(
+        self,
+        client: mqtt.Client,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        reconnect: bool = True,
+        reconnect_min_delay: float = 1.0,
+        reconnect_max_delay: float = 30.0
+    ):
+        self.client = client
+        self.loop = loop or asyncio.get_running_loop()
+        self.reconnect = reconnect
+        self.reconnect_min_delay = reconnect_min_delay
+        self.reconnect_max_delay = reconnect_max_delay
+
+        self._misc_task: Optional[asyncio.Task] = None
+        self._socket_closed = asyncio.Event()
+        self._stopping = False
+
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+
+    def start(self) -> None:
+        """Start the periodic housekeeping task. Call after ``client.connect()``."""
+        self._stopping = False
+        if self._misc_task is None or self._misc_task.done():
+            self._misc_task = self.loop.create_task(self._misc_loop())
+
+    async def disconnect(self, timeout: float = 2.0) -> None:
+        """Disconnect the client and wait for its socket to be closed."""
+        self._stopping = True
+
+        if self.client.is_connected():
+            self._socket_closed.clear()
+            self.client.disconnect()
+            try:
+                await asyncio.wait_for(self._socket_closed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Timeout waiting for MQTT socket to close")
+
+        if self._misc_task:
+            self._misc_task.cancel()
+            try:
+                await self._misc_task
+            except asyncio.CancelledError:
+                pass
+            self._misc_task = None
+
+    def _on_socket_open(self, client: mqtt.Client, userdata: Any, sock: Any) -> None:
+        """Register the new socket for reads on the event loop."""
+        self.loop.add_reader(sock, client.loop_read)
+
+    def _on_socket_close(self, client: mqtt.Client, userdata: Any, sock: Any) -> None:
+        """Unregister the closed socket from the event loop."""
+        self.loop.remove_reader(sock)
+        self.loop.remove_writer(sock)
+        self._socket_closed.set()
+
+    def _on_socket_register_write(self, client: mqtt.Client, userdata: Any, sock: Any) -> None:
+        """Watch the socket for writability while paho has data queued."""
+        self.loop.add_writer(sock, client.loop_write)
+
+    def _on_socket_unregister_write(self, client: mqtt.Client, userdata: Any, sock: Any) -> None:
+        """Stop watching the socket for writability."""
+        self.loop.remove_writer(sock)
+
+    async def _misc_loop(self) -> None:
+        """Run paho's periodic housekeeping and reconnect after connection loss."""
+        delay = self.reconnect_min_delay
+
+        while not self._stopping:
+            try:
+                rc = self.client.loop_misc()
+
+                if rc == mqtt.MQTT_ERR_NO_CONN and self.reconnect and not self._stopping:
+                    logger.info("Reconnecting to MQTT broker...")
+                    # paho's reconnect() resolves and connects with blocking calls, so
+                    # only call it once the broker is known to accept connections
+                    if not await self._broker_reachable():
+                        raise OSError(f"broker {self.client.host}:{self.client.port} unreachable")
+                    self.client.reconnect()
+                    delay = self.reconnect_min_delay
+            except OSError as e:
+                logger.warning(f"MQTT reconnect failed: {e} (retrying in {delay:.0f}s)")
+            except Exception:
+                # Never let the task die: keepalive and reconnect would stop for good
+                logger.exception(f"MQTT housekeeping failed (retrying in {delay:.0f}s)")
+            else:
+                await asyncio.sleep(1)
+                continue
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.reconnect_max_delay)
+
+    async def _broker_reachable(self, timeout: float = 5.0) -> bool:
+        """Check without blocking the event loop that the broker accepts TCP connections."""
+        try:
+            addresses = await self.loop.getaddrinfo(
+                self.client.host, self.client.port, type=socket.SOCK_STREAM
+            )
+        except OSError:
+            return False
+
+        for family, sock_type, proto, _, address in addresses:
+            sock = socket.socket(family, sock_type, proto)
+            sock.setblocking(False)
+            try:
+                async with asyncio.timeout(timeout):
+                    await self.loop.sock_connect(sock, address)
+                return True
+            except (OSError, TimeoutError):
+                continue
+            finally:
+                sock.close()
+        return False
@@ -8,14 +8,21 @@ Simplified for embedded device compatibility.
 
 import asyncio
 import time
-from typing import Dict, Any, Optional, Set, Union
+from array import array
+from collections import deque
+from typing import Deque, Dict, Any, List, Optional, Set, Tuple, Union
 from contextlib import asynccontextmanager
 
 import paho.mqtt.client as mqtt
 from loguru import logger
 
 from ..ai_services import AIServiceInterface, AudioRequest
+from .asyncio_loop import AsyncioMQTTLoop
 from .messages import (
+    FRAME_MAGIC,
+    decode_audio_base64,
+    encode_audio_base64,
+    new_message_id,
     MessageParser, 
     AudioRequestMessage, 
     AudioResponseMessage, 
@@ -23,7 +30,23 @@ from .messages import (
     HealthCheckMessage,
     MessageType
 )
-from ..ai_services.base import AIServiceProcessingError
+from ..ai_services.base import AIServiceProcessingError, AudioResponse
+
+
+# Message counters, indexes into MQTTAIServer._message_stats
+_STAT_REQUESTS_PROCESSED = 0
+_STAT_RESPONSES_SENT = 1
+_STAT_ERRORS = 2
+_STAT_NAMES = ("requests_processed", "responses_sent", "errors")
+
+
+def _join_audio_base64(chunks: List[str]) -> str:
+    """Concatenate base64 audio chunks into one base64 string."""
+    # Unpadded base64 strings concatenate directly; padding inside needs a re-encode
+    if not any(chunk.endswith("=") for chunk in chunks[:-1]):
+        return "".join(chunks)
+    joined: str = encode_audio_base64(b"".join(decode_audio_base64(chunk) for chunk in chunks))
+    return joined
 
 
 class MQTTAIServer:
@@ -57,31 +80,54 @@ class MQTTAIServer:
         self.ai_service = ai_service
         self.server_config = server_config or {}
         
-        # MQTT client
+        # MQTT client, driven from the event loop (no paho network thread)
         self.mqtt_client: Optional[mqtt.Client] = None
+        self._mqtt_loop: Optional[AsyncioMQTTLoop] = None
         self._client_id = mqtt_config.get("client_id", "mqtt-ai-server")
         
         # Server state
         self._running = False
-        self._start_time = time.time()
-        self._active_sessions: Set[str] = set()
-        self._message_stats = {
-            "requests_processed": 0,
-            "responses_sent": 0,
-            "errors": 0
-        }
+        self._stopped = asyncio.Event()
+        self._start_time = time.monotonic()  # Uptime only, not a wall-clock time
+        self._active_sessions = 0
+        # Fixed-size counter array: an index store per update instead of a dict lookup
+        self._message_stats = array("Q", [0] * len(_STAT_NAMES))
         
         # Topics
         self.request_topic_pattern = mqtt_config.get("request_topic", "iot/+/audio_request")
-        self.response_topic_template = mqtt_config.get("response_topic", "iot/{device_id}/audio_response")
+        self.response_topic_template: str = mqtt_config.get("response_topic", "iot/{device_id}/audio_response")
         self.health_topic = mqtt_config.get("health_topic", "iot/server/health")
+        # Split the response template around {device_id} once, so building a topic
+        # is a concatenation instead of a format() parse per publish
+        self._response_topic_parts = self._split_topic_template(self.response_topic_template)
+        
+        # Health message parts that do not change while the server runs
+        self._ai_service_name = type(ai_service).__name__
+        self._supported_features = ai_service.get_supported_features()
         
         # Processing settings
         self.max_concurrent_sessions = self.server_config.get("max_concurrent_sessions", 50)
+        self._session_slots = asyncio.Semaphore(self.max_concurrent_sessions)
         self.session_timeout_seconds = self.server_config.get("session_timeout_seconds", 300)
         
-        # Event loop for thread-safe asyncio operations
-        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Message handler tasks, referenced until they finish. Past the limit new
+        # messages are dropped before a task is created for them, so a burst cannot
+        # pile up tasks faster than the capacity check can answer them.
+        self._message_tasks: Set[asyncio.Task] = set()
+        self.max_pending_messages = self.server_config.get(
+            "max_pending_messages", 2 * self.max_concurrent_sessions
+        )
+        # Publishes waiting to be acknowledged (QoS 1) or written (QoS 0), by message id
+        self._publish_waiters: Dict[int, asyncio.Future] = {}
+        self.publish_ack_timeout = self.server_config.get("publish_ack_timeout", 5.0)
+        # Unfinished publishes allowed per response stream before chunks are batched
+        self.publish_window = self.server_config.get("publish_window", 4)
+        # Chunks merged into one message at most (0 for no limit), and how long a
+        # batch waits for more chunks before it is published (0 to never wait)
+        self.max_batch_size = self.server_config.get("max_batch_size", 0)
+        self.max_batch_delay = self.server_config.get("max_batch_delay_ms", 0) / 1000
+        # QoS for response chunks before the last one; the last is sent at QoS 1 or higher
+        self.stream_qos = self.server_config.get("stream_qos", 0)
     
     async def start(self) -> None:
         """Start the MQTT AI Server."""
@@ -99,23 +145,32 @@ class MQTTAIServer:
             asyncio.create_task(self._health_check_loop(health_interval))
         
         self._running = True
+        self._stopped.clear()
         logger.info("MQTT AI Server started successfully")
     
     async def stop(self) -> None:
         """Stop the MQTT AI Server."""
         logger.info("Stopping MQTT AI Server")
         self._running = False
+        self._stopped.set()
         
         # Disconnect from MQTT broker
-        if self.mqtt_client:
-            self.mqtt_client.loop_stop()
-            self.mqtt_client.disconnect()
+        if self._mqtt_loop:
+            await self._mqtt_loop.disconnect()
         
         # Clean up AI service
         await self.ai_service.cleanup()
         
         logger.info("MQTT AI Server stopped")
     
+    def request_stop(self) -> None:
+        """Make wait_until_stopped() return without stopping the server itself."""
+        self._stopped.set()
+    
+    async def wait_until_stopped(self) -> None:
+        """Wait until stop() or request_stop() has been called."""
+        await self._stopped.wait()
+    
     async def _connect_mqtt(self) -> None:
         """Connect to MQTT broker."""
         logger.info(f"Connecting to MQTT broker at {self.mqtt_config['host']}:{self.mqtt_config['port']}")
@@ -135,11 +190,24 @@ class MQTTAIServer:
         self.mqtt_client.on_disconnect = self._on_disconnect
         self.mqtt_client.on_message = self._on_message
         self.mqtt_client.on_subscribe = self._on_subscribe
+        self.mqtt_client.on_publish = self._on_publish
+        
+        # Let more QoS 1 responses be in flight than paho's default of 20, so streams
+        # of many devices are not serialized on PUBACKs; bound the send queue instead
+        self.mqtt_client.max_inflight_messages_set(self.mqtt_config.get("max_inflight", 200))
+        self.mqtt_client.max_queued_messages_set(self.mqtt_config.get("max_queued", 10000))
         
         # Enable TLS if configured
         if self.mqtt_config.get("use_tls", False):
             self.mqtt_client.tls_set()
         
+        # Callbacks run on this event loop, so messages are handled without a thread hop
+        self._mqtt_loop = AsyncioMQTTLoop(
+            self.mqtt_client,
+            reconnect_min_delay=self.mqtt_config.get("reconnect_min_delay", 1.0),
+            reconnect_max_delay=self.mqtt_config.get("reconnect_max_delay", 30.0)
+        )
+        
         # Connect to broker
         try:
             self.mqtt_client.connect(
@@ -147,12 +215,7 @@ class MQTTAIServer:
                 self.mqtt_config["port"],
                 self.mqtt_config.get("keepalive", 60)
             )
-            
-            # Start the loop in a separate thread
-            self.mqtt_client.loop_start()
-            
-            # Store event loop for async operations
-            self._loop = asyncio.get_event_loop()
+            self._mqtt_loop.start()
             
             logger.info("MQTT connection initiated")
             
@@ -160,6 +223,21 @@ class MQTTAIServer:
             logger.error(f"Failed to connect to MQTT broker: {e}")
             raise
     
+    @staticmethod
+    def _split_topic_template(template: str) -> Optional[Tuple[str, str]]:
+        """Return (prefix, suffix) around a single {device_id}, or None if the template needs format()."""
+        prefix, placeholder, suffix = template.partition("{device_id}")
+        if not placeholder or any(brace in prefix + suffix for brace in "{}"):
+            return None
+        return prefix, suffix
+    
+    def _response_topic(self, device_id: str) -> str:
+        """Build the response topic for a device."""
+        if self._response_topic_parts is None:
+            return self.response_topic_template.format(device_id=device_id)
+        prefix, suffix = self._response_topic_parts
+        return prefix + device_id + suffix
+    
     def _on_connect(self, client: mqtt.Client, userdata: Any, flags: Dict[str, int], rc: int) -> None:
         """Callback for when the client connects to the broker."""
         if rc == 0:
@@ -183,13 +261,39 @@ class MQTTAIServer:
         """Callback for when subscription is acknowledged."""
         logger.info(f"Subscribed to topics successfully (mid: {mid})")
     
+    def _on_publish(self, client: mqtt.Client, userdata: Any, mid: int) -> None:
+        """Callback for when a publish has been acknowledged (QoS 1) or sent (QoS 0)."""
+        waiter = self._publish_waiters.pop(mid, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+    
     def _on_message(self, client: mqtt.Client, userdata: Any, msg: mqtt.MQTTMessage) -> None:
         """Callback for when a message is received."""
-        if self._loop and not self._loop.is_closed():
-            # Schedule the coroutine to run in the main event loop thread
-            asyncio.run_coroutine_threadsafe(self._handle_message(msg), self._loop)
-        else:
-            logger.error("Event loop not available for handling message")
+        if len(self._message_tasks) >= self.max_pending_messages:
+            logger.warning("Dropping message on {}: {} messages already pending", msg.topic, len(self._message_tasks))
+            self._message_stats[_STAT_ERRORS] += 1
+            self._reject_message(msg)
+            return
+        
+        # Already on the event loop thread: start the handler as a task directly
+        task = asyncio.create_task(self._handle_message(msg))
+        self._message_tasks.add(task)
+        task.add_done_callback(self._message_tasks.discard)
+    
+    def _reject_message(self, msg: mqtt.MQTTMessage) -> None:
+        """Tell the device that its dropped request was not processed, so it does not wait for a response."""
+        try:
+            message = MessageParser.parse_message(msg.payload)
+        except Exception as e:
+            logger.debug(f"Could not parse dropped message: {e}")
+            return
+        
+        if isinstance(message, AudioRequestMessage):
+            self._send_error_response(
+                message,
+                "CAPACITY_EXCEEDED",
+                "Server at maximum capacity"
+            )
     
     async def _handle_message(self, msg: mqtt.MQTTMessage) -> None:
         """Handle incoming MQTT message."""
@@ -197,87 +301,209 @@ class MQTTAIServer:
             # Parse message
             message = MessageParser.parse_message(msg.payload)
             
-            # Route to appropriate handler
+            # Route to appropriate handler. Responses use the request's format, so
+            # devices sending binary frames get raw audio back instead of base64.
             if isinstance(message, AudioRequestMessage):
-                await self._handle_audio_request(message)
+                await self._handle_audio_request(message, binary=msg.payload.startswith(FRAME_MAGIC))
             else:
                 logger.warning(f"Unsupported message type: {type(message)}")
                 
         except Exception as e:
             logger.error(f"Error handling message: {e}")
-            self._message_stats["errors"] += 1
+            self._message_stats[_STAT_ERRORS] += 1
     
-    async def _handle_audio_request(self, request: AudioRequestMessage) -> None:
-        """Handle simplified audio request from IoT device."""
+    async def _handle_audio_request(self, request: AudioRequestMessage, binary: bool = False) -> None:
+        """Handle simplified audio request from IoT device, answering as binary frames if binary is set."""
         device_id = request.device_id
         session_id = request.session_id
         
-        logger.info(f"Processing audio request from device {device_id} (session: {session_id})")
+        logger.info("Processing audio request from device {} (session: {})", device_id, session_id)
+        
+        # Check concurrent sessions limit. A free slot is taken without waiting
+        # (acquire() returns immediately when not locked), a full server rejects.
+        if self._session_slots.locked():
+            self._send_error_response(
+                request, 
+                "CAPACITY_EXCEEDED", 
+                "Server at maximum capacity"
+            )
+            return
+        await self._session_slots.acquire()
+        self._active_sessions += 1
         
         try:
-            # Check concurrent sessions limit
-            if len(self._active_sessions) >= self.max_concurrent_sessions:
-                await self._send_error_response(
-                    request, 
-                    "CAPACITY_EXCEEDED", 
-                    "Server at maximum capacity"
-                )
-                return
-            
-            # Add to active sessions
-            self._active_sessions.add(session_id)
-            
             # Create simplified AI service request
             ai_request = AudioRequest(
                 audio_data=request.audio_data,  # Already raw PCM16 bytes
                 session_id=session_id,
-                device_id=device_id
+                device_id=device_id,
+                base64_response=not binary  # JSON responses keep the API's base64
             )
             
-            # Process through AI service
-            async for response_chunk in self.ai_service.process_audio_stream(ai_request):
-                # Create simplified response message
-                response_msg = AudioResponseMessage.create(
-                    request_message=request,
-                    audio_data=response_chunk.audio_data  # Already raw PCM16 bytes
-                )
-                
-                # Send response
-                await self._send_audio_response(response_msg)
+            # Process through AI service. Chunks are handed to a publisher task, which
+            # sends them one by one while the device keeps up and merges the chunks
+            # that arrived while the previous publish was still unacknowledged.
+            chunks: asyncio.Queue = asyncio.Queue()
+            publisher = asyncio.create_task(self._publish_audio_responses(request, chunks, binary))
+            try:
+                async for response_chunk in self.ai_service.process_audio_stream(ai_request):
+                    chunks.put_nowait(response_chunk)
+            finally:
+                chunks.put_nowait(None)
+                await publisher
             
-            self._message_stats["requests_processed"] += 1
-            logger.info(f"Completed audio request for device {device_id}")
+            self._message_stats[_STAT_REQUESTS_PROCESSED] += 1
+            logger.info("Completed audio request for device {}", device_id)
             
         except AIServiceProcessingError as e:
             logger.warning(f"Client error processing audio request: {e}")
-            await self._send_error_response(request, "PROCESSING_ERROR", str(e))
-            self._message_stats["errors"] += 1
+            self._send_error_response(request, "PROCESSING_ERROR", str(e))
+            self._message_stats[_STAT_ERRORS] += 1
         except Exception as e:
             logger.error(f"Error processing audio request: {e}")
-            await self._send_error_response(request, "PROCESSING_ERROR", str(e))
-            self._message_stats["errors"] += 1
+            self._send_error_response(request, "PROCESSING_ERROR", str(e))
+            self._message_stats[_STAT_ERRORS] += 1
         
         finally:
-            # Remove from active sessions
-            self._active_sessions.discard(session_id)
+            # Free the session slot
+            self._active_sessions -= 1
+            self._session_slots.release()
     
-    async def _send_audio_response(self, response: AudioResponseMessage) -> None:
-        """Send audio response to IoT device."""
+    async def _publish_audio_responses(
+        self,
+        request: AudioRequestMessage,
+        chunks: asyncio.Queue,
+        binary: bool = False
+    ) -> None:
+        """
+        Publish queued response chunks.
+        
+        Up to publish_window publishes of a stream are unfinished at a time. Chunks
+        that arrive while the window is full, or within max_batch_delay of the first
+        chunk of a batch, are merged into one message of up to max_batch_size chunks.
+        """
+        # With stream QoS 0 each batch is held until the next chunk or the end of the
+        # stream shows whether it is the last one, which goes out at QoS 1. At QoS 1
+        # or 2 every batch, the last included, is sent at the stream QoS right away.
+        hold_last = self.stream_qos < 1
+        pending: Optional[List[AudioResponse]] = None
+        finished = False
+        
+        # One message is reused for the whole stream; it is refilled right before
+        # each publish, and serialized before the publish yields to the loop
+        response = AudioResponseMessage.create(request_message=request, audio_data=b"")
+        
+        # Bound once per stream rather than looked up again for every chunk
+        topic = self._response_topic(request.device_id)
+        send = self._send_audio_response
+        fill = self._fill_audio_response
+        wait = self._wait_until_published
+        buffer = bytearray()
+        stream_qos = self.stream_qos
+        window = self.publish_window
+        max_batch_size = self.max_batch_size
+        max_batch_delay = self.max_batch_delay
+        loop = asyncio.get_running_loop()
+        inflight: Deque[mqtt.MQTTMessageInfo] = deque()
+        
+        def publish(batch: List[AudioResponse], qos: int) -> None:
+            result = send(fill(response, batch, buffer), binary, qos=qos, topic=topic)
+            if result is not None:
+                inflight.append(result)
+        
+        while not finished:
+            while len(inflight) >= window:
+                await wait(inflight.popleft())
+            
+            chunk = await chunks.get()
+            if chunk is None:
+                break
+            
+            batch = [chunk]
+            deadline = loop.time() + max_batch_delay
+            while not max_batch_size or len(batch) < max_batch_size:
+                if not chunks.empty():
+                    chunk = chunks.get_nowait()
+                else:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        chunk = await asyncio.wait_for(chunks.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if chunk is None:
+                    finished = True
+                    break
+                batch.append(chunk)
+            
+            if not hold_last:
+                publish(batch, stream_qos)
+                continue
+            if pending is not None:
+                publish(pending, stream_qos)
+            pending = batch
+        
+        if pending is not None:
+            publish(pending, 1)
+        while inflight:
+            await wait(inflight.popleft())
+    
+    def _fill_audio_response(
+        self,
+        response: AudioResponseMessage,
+        batch: List[AudioResponse],
+        buffer: bytearray
+    ) -> AudioResponseMessage:
+        """
+        Refill a response message with a new id, timestamp and the audio of a batch of chunks.
+        
+        Raw audio of several chunks is gathered in buffer, which is reused for the
+        whole stream; the message must be serialized before the next refill.
+        """
+        response.message_id = new_message_id()
+        response.timestamp = time.time()
+        
+        if len(batch) == 1:
+            response.audio_data = batch[0].audio_data
+            response.audio_base64 = batch[0].audio_base64
+        elif all(chunk.audio_base64 is not None for chunk in batch):
+            response.audio_data = b""
+            response.audio_base64 = _join_audio_base64(
+                [chunk.audio_base64 for chunk in batch if chunk.audio_base64 is not None]
+            )
+        else:
+            buffer.clear()
+            for chunk in batch:
+                buffer += decode_audio_base64(chunk.audio_base64) if chunk.audio_base64 is not None else chunk.audio_data
+            response.audio_data = buffer
+            response.audio_base64 = None
+        return response
+    
+    def _send_audio_response(
+        self,
+        response: AudioResponseMessage,
+        binary: bool = False,
+        qos: int = 1,
+        topic: Optional[str] = None
+    ) -> Optional[mqtt.MQTTMessageInfo]:
+        """Send audio response to IoT device. Returns the publish result, or None if it failed."""
         try:
-            # Format response topic
-            response_topic = self.response_topic_template.format(device_id=response.device_id)
+            # Format response topic, unless the caller already built it
+            response_topic = topic or self._response_topic(response.device_id)
             
             # Publish response
             if self.mqtt_client:
                 result = self.mqtt_client.publish(
                     response_topic,
-                    response.to_json(),
-                    qos=1
+                    response.to_frame() if binary else response.to_json_bytes(),
+                    qos=qos
                 )
                 
                 if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                    self._message_stats["responses_sent"] += 1
-                    logger.debug(f"Sent audio response to {response.device_id}")
+                    # Counted, not logged: the periodic stats line reports sent responses
+                    self._message_stats[_STAT_RESPONSES_SENT] += 1
+                    return result
                 else:
                     logger.error(f"Failed to send audio response: {result.rc}")
             else:
@@ -285,8 +511,23 @@ class MQTTAIServer:
                 
         except Exception as e:
             logger.error(f"Error sending audio response: {e}")
+        return None
+    
+    async def _wait_until_published(self, result: mqtt.MQTTMessageInfo) -> None:
+        """Wait for on_publish of a message, giving up after publish_ack_timeout."""
+        if result.is_published():
+            return
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self._publish_waiters[result.mid] = waiter
+        try:
+            await asyncio.wait_for(waiter, timeout=self.publish_ack_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Message {result.mid} not published after {self.publish_ack_timeout}s")
+        finally:
+            self._publish_waiters.pop(result.mid, None)
     
-    async def _send_error_response(
+    def _send_error_response(
         self, 
         original_request: AudioRequestMessage, 
         error_code: str, 
@@ -304,18 +545,18 @@ class MQTTAIServer:
             )
             
             # Format response topic
-            response_topic = self.response_topic_template.format(device_id=original_request.device_id)
+            response_topic = self._response_topic(original_request.device_id)
             
             # Publish error
             if self.mqtt_client:
                 result = self.mqtt_client.publish(
                     response_topic,
-                    error_msg.to_json(),
+                    error_msg.to_json_bytes(),
                     qos=1
                 )
                 
                 if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                    logger.debug(f"Sent error response to {original_request.device_id}")
+                    logger.debug("Sent error response to {}", original_request.device_id)
                 else:
                     logger.error(f"Failed to send error response: {result.rc}")
             else:
@@ -349,12 +590,12 @@ class MQTTAIServer:
             if self.mqtt_client:
                 result = self.mqtt_client.publish(
                     self.health_topic,
-                    health_msg.to_json(),
+                    health_msg.to_json_bytes(),
                     qos=0
                 )
                 
                 if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                    logger.debug(f"Sent health check: {status}")
+                    logger.debug("Sent health check: {}", status)
                 else:
                     logger.warning(f"Failed to send health check: {result.rc}")
                     
@@ -363,7 +604,7 @@ class MQTTAIServer:
     
     def _create_health_message(self, status: str = "healthy") -> HealthCheckMessage:
         """Create a health check message."""
-        uptime = time.time() - self._start_time
+        uptime = time.monotonic() - self._start_time
         
         return HealthCheckMessage(
             message_id="",  # Will be auto-generated
@@ -373,23 +614,30 @@ class MQTTAIServer:
             session_id="",
             status=status,
             uptime_seconds=uptime,
-            active_sessions=len(self._active_sessions),
+            active_sessions=self._active_sessions,
             system_info={
-                "ai_service": type(self.ai_service).__name__,
-                "supported_features": self.ai_service.get_supported_features(),
-                "stats": self._message_stats.copy()
+                "ai_service": self._ai_service_name,
+                "supported_features": self._supported_features,
+                "stats": self._message_stats_dict()
             }
         )
     
+    def _message_stats_dict(self) -> Dict[str, int]:
+        """Return a snapshot of the message counters by name."""
+        return dict(zip(_STAT_NAMES, self._message_stats))
+    
+    def is_connected(self) -> bool:
+        """Return whether the MQTT client is connected to the broker."""
+        return self.mqtt_client is not None and self.mqtt_client.is_connected()
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get server statistics."""
         return {
-            "uptime_seconds": time.time() - self._start_time,
-            "active_sessions": len(self._active_sessions),
+            "uptime_seconds": time.monotonic() - self._start_time,
+            "active_sessions": self._active_sessions,
             "is_running": self._running,
-            "mqtt_connected": (hasattr(self.mqtt_client, 'is_connected') and 
-                              self.mqtt_client.is_connected()) if self.mqtt_client else False,
-            "message_stats": self._message_stats.copy()
+            "mqtt_connected": self.is_connected(),
+            "message_stats": self._message_stats_dict()
         }
     
     @asynccontextmanager
@@ -5,13 +5,70 @@ This module defines the simplified message formats used for communication betwee
 Optimized for embedded devices with minimal processing overhead.
 """
 
-import json
-import base64
+import os
+import struct
 import time
 import uuid
 from enum import Enum
-from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any, Union
+from functools import lru_cache
+from dataclasses import dataclass, field
+from typing import Callable, ClassVar, Optional, Dict, Any, Union
+
+import orjson
+
+from ..base64_compat import b64decode as decode_audio_base64, b64encode_as_string as encode_audio_base64
+
+
+# Binary frame layout: FRAME_MAGIC, 2-byte big-endian header length,
+# JSON header (message fields without audio_data), then raw PCM16 audio.
+# Avoids base64 inflation and JSON framing of the audio payload.
+FRAME_MAGIC = b"\xa5\x01"
+_FRAME_PREFIX = struct.Struct("!2sH")
+
+# Random bytes for message ids, drawn from the OS in one block instead of
+# one os.urandom() call per uuid4()
+_UUID_POOL_SIZE = 4096
+_uuid_pool = b""
+_uuid_offset = 0
+
+
+def new_message_id() -> str:
+    """Return a random (version 4) UUID string for a message id."""
+    global _uuid_pool, _uuid_offset
+    offset = _uuid_offset
+    if offset + 16 > len(_uuid_pool):
+        _uuid_pool = os.urandom(_UUID_POOL_SIZE)
+        offset = 0
+    _uuid_offset = offset + 16
+    return str(uuid.UUID(bytes=_uuid_pool[offset:offset + 16], version=4))
+
+
+def encode_frame(header: Dict[str, Any], audio_data: Union[bytes, bytearray, memoryview]) -> bytes:
+    """Pack a message header and raw audio into a binary frame."""
+    header_bytes = orjson.dumps(header)
+    return _FRAME_PREFIX.pack(FRAME_MAGIC, len(header_bytes)) + header_bytes + audio_data
+
+
+def decode_frame(payload: bytes) -> Dict[str, Any]:
+    """Unpack a binary frame into a message dictionary with raw audio_data."""
+    if len(payload) < _FRAME_PREFIX.size:
+        raise ValueError("Truncated binary frame")
+    
+    _, header_length = _FRAME_PREFIX.unpack_from(payload)
+    audio_offset = _FRAME_PREFIX.size + header_length
+    if len(payload) < audio_offset:
+        raise ValueError("Truncated binary frame header")
+    
+    # Header and audio are both read through views of the payload, without copies
+    view = memoryview(payload)
+    try:
+        data: Dict[str, Any] = orjson.loads(view[_FRAME_PREFIX.size:audio_offset])
+    except orjson.JSONDecodeError as e:
+        raise ValueError(f"Invalid binary frame header: {e}")
+    
+    # Zero-copy view of the audio; it keeps the payload alive
+    data["audio_data"] = view[audio_offset:]
+    return data
 
 
 class MessageType(Enum):
@@ -24,7 +81,11 @@ class MessageType(Enum):
     SESSION_END = "session_end"
 
 
-@dataclass
+# Wire string of each message type; a dict hit is cheaper than Enum.value per message
+_MESSAGE_TYPE_VALUES: Dict[MessageType, str] = {message_type: message_type.value for message_type in MessageType}
+
+
+@dataclass(slots=True)
 class AudioMessage:
     """Base class for audio messages in MQTT communication."""
     
@@ -34,65 +95,86 @@ class AudioMessage:
     message_type: MessageType
     session_id: str
     
+    # Type forced on every instance of a subclass, None to keep the given one
+    MESSAGE_TYPE: ClassVar[Optional[MessageType]] = None
+    
     def __post_init__(self) -> None:
-        """Ensure message_id and timestamp are set."""
+        """Ensure message_id, timestamp and the subclass message_type are set."""
         if not self.message_id:
-            self.message_id = str(uuid.uuid4())
+            self.message_id = new_message_id()
         if not self.timestamp:
             self.timestamp = time.time()
+        if self.MESSAGE_TYPE is not None:
+            self.message_type = self.MESSAGE_TYPE
+    
+    def _header_dict(self) -> Dict[str, Any]:
+        """Return the fields shared by every message type."""
+        return {
+            "message_id": self.message_id,
+            "device_id": self.device_id,
+            "timestamp": self.timestamp,
+            "message_type": _MESSAGE_TYPE_VALUES[self.message_type],
+            "session_id": self.session_id,
+        }
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert message to dictionary for JSON serialization."""
-        data = asdict(self)
-        data["message_type"] = self.message_type.value
-        return data
+        # Spelled out per class instead of walking dataclass fields on every chunk
+        return self._header_dict()
     
     def to_json(self) -> str:
         """Convert message to JSON string."""
-        return json.dumps(self.to_dict())
+        return orjson.dumps(self.to_dict()).decode()
+    
+    def to_json_bytes(self) -> bytes:
+        """Convert message to UTF-8 JSON bytes, ready to publish without an encode step."""
+        return orjson.dumps(self.to_dict())
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "AudioMessage":
         """Create message from dictionary."""
-        # Convert message_type back to enum
-        if "message_type" in data:
+        # Subclasses force their own type in __post_init__, so only the base class
+        # needs the payload string converted back to an enum
+        if cls.MESSAGE_TYPE is not None:
+            data["message_type"] = cls.MESSAGE_TYPE
+        elif "message_type" in data:
             data["message_type"] = MessageType(data["message_type"])
         return cls(**data)
     
     @classmethod
     def from_json(cls, json_str: str) -> "AudioMessage":
         """Create message from JSON string."""
-        data = json.loads(json_str)
+        data = orjson.loads(json_str)
         return cls.from_dict(data)
 
 
-@dataclass
+@dataclass(slots=True)
 class AudioRequestMessage(AudioMessage):
     """Simplified audio request message from IoT device to AI server."""
     
-    audio_data: bytes  # Raw PCM16 audio data (24kHz, mono, 16-bit)
+    audio_data: Union[bytes, memoryview]  # Raw PCM16 audio data (24kHz, mono, 16-bit)
     
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        self.message_type = MessageType.AUDIO_REQUEST
+    MESSAGE_TYPE: ClassVar[Optional[MessageType]] = MessageType.AUDIO_REQUEST
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert message to dictionary for JSON serialization."""
-        data = super().to_dict()
+        data = self._header_dict()
         # Encode audio data as base64 for JSON transport
-        data["audio_data"] = base64.b64encode(self.audio_data).decode()
+        data["audio_data"] = encode_audio_base64(self.audio_data)
         return data
     
+    def to_frame(self) -> bytes:
+        """Convert message to a binary frame carrying the raw audio."""
+        return encode_frame(self._header_dict(), self.audio_data)
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "AudioRequestMessage":
         """Create AudioRequestMessage from dictionary."""
-        # Convert message_type back to enum
-        if "message_type" in data:
-            data["message_type"] = MessageType(data["message_type"])
+        data["message_type"] = cls.MESSAGE_TYPE
         
         # Decode base64 audio data back to bytes
         if "audio_data" in data and isinstance(data["audio_data"], str):
-            data["audio_data"] = base64.b64decode(data["audio_data"])
+            data["audio_data"] = decode_audio_base64(data["audio_data"])
         
         return cls(**data)
     
@@ -100,49 +182,55 @@ class AudioRequestMessage(AudioMessage):
     def create(
         cls,
         device_id: str,
-        audio_data: bytes,
+        audio_data: Union[bytes, memoryview],
         session_id: str = "",
         **kwargs: Any
     ) -> "AudioRequestMessage":
         """Create a simplified audio request message."""
         
         return cls(
-            message_id=str(uuid.uuid4()),
+            message_id=new_message_id(),
             device_id=device_id,
             timestamp=time.time(),
             message_type=MessageType.AUDIO_REQUEST,
-            session_id=session_id or str(uuid.uuid4()),
+            session_id=session_id or new_message_id(),
             audio_data=audio_data
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class AudioResponseMessage(AudioMessage):
     """Simplified audio response message from AI server to IoT device."""
     
-    audio_data: bytes  # Raw PCM16 audio response (24kHz, mono, 16-bit)
+    audio_data: Union[bytes, bytearray, memoryview]  # Raw PCM16 audio response (24kHz, mono, 16-bit)
+    # Already base64-encoded audio, used in place of audio_data when set
+    audio_base64: Optional[str] = field(default=None, repr=False)
     
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        self.message_type = MessageType.AUDIO_RESPONSE
+    MESSAGE_TYPE: ClassVar[Optional[MessageType]] = MessageType.AUDIO_RESPONSE
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert message to dictionary for JSON serialization."""
-        data = super().to_dict()
+        data = self._header_dict()
+        audio_base64 = self.audio_base64
         # Encode audio data as base64 for JSON transport
-        data["audio_data"] = base64.b64encode(self.audio_data).decode()
+        data["audio_data"] = audio_base64 if audio_base64 is not None else encode_audio_base64(self.audio_data)
         return data
     
+    def to_frame(self) -> bytes:
+        """Convert message to a binary frame carrying the raw audio."""
+        audio_data = self.audio_data
+        if self.audio_base64 is not None:
+            audio_data = decode_audio_base64(self.audio_base64)
+        return encode_frame(self._header_dict(), audio_data)
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "AudioResponseMessage":
         """Create AudioResponseMessage from dictionary."""
-        # Convert message_type back to enum
-        if "message_type" in data:
-            data["message_type"] = MessageType(data["message_type"])
+        data["message_type"] = cls.MESSAGE_TYPE
         
         # Decode base64 audio data back to bytes
         if "audio_data" in data and isinstance(data["audio_data"], str):
-            data["audio_data"] = base64.b64decode(data["audio_data"])
+            data["audio_data"] = decode_audio_base64(data["audio_data"])
         
         return cls(**data)
     
@@ -151,21 +239,24 @@ class AudioResponseMessage(AudioMessage):
         cls,
         request_message: AudioRequestMessage,
         audio_data: bytes,
+        audio_base64: Optional[str] = None,
+        timestamp: Optional[float] = None,
         **kwargs: Any
     ) -> "AudioResponseMessage":
         """Create a simplified audio response message from a request."""
         
         return cls(
-            message_id=str(uuid.uuid4()),
+            message_id=new_message_id(),
             device_id=request_message.device_id,
-            timestamp=time.time(),
+            timestamp=timestamp or time.time(),
             message_type=MessageType.AUDIO_RESPONSE,
             session_id=request_message.session_id,
-            audio_data=audio_data
+            audio_data=audio_data,
+            audio_base64=audio_base64
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class ErrorMessage(AudioMessage):
     """Error message for communication issues."""
     
@@ -173,9 +264,15 @@ class ErrorMessage(AudioMessage):
     error_message: str
     original_message_id: Optional[str] = None
     
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        self.message_type = MessageType.ERROR
+    MESSAGE_TYPE: ClassVar[Optional[MessageType]] = MessageType.ERROR
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert message to dictionary for JSON serialization."""
+        data = self._header_dict()
+        data["error_code"] = self.error_code
+        data["error_message"] = self.error_message
+        data["original_message_id"] = self.original_message_id
+        return data
     
     @classmethod
     def create(
@@ -188,7 +285,7 @@ class ErrorMessage(AudioMessage):
     ) -> "ErrorMessage":
         """Create an error message."""
         return cls(
-            message_id=str(uuid.uuid4()),
+            message_id=new_message_id(),
             device_id=device_id,
             timestamp=time.time(),
             message_type=MessageType.ERROR,
@@ -199,7 +296,7 @@ class ErrorMessage(AudioMessage):
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class HealthCheckMessage(AudioMessage):
     """Health check message for system monitoring."""
     
@@ -208,9 +305,28 @@ class HealthCheckMessage(AudioMessage):
     active_sessions: int = 0
     system_info: Optional[Dict[str, Any]] = None
     
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        self.message_type = MessageType.HEALTH_CHECK
+    MESSAGE_TYPE: ClassVar[Optional[MessageType]] = MessageType.HEALTH_CHECK
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert message to dictionary for JSON serialization."""
+        data = self._header_dict()
+        data["status"] = self.status
+        data["uptime_seconds"] = self.uptime_seconds
+        data["active_sessions"] = self.active_sessions
+        data["system_info"] = self.system_info
+        return data
+
+
+# Parser for each message_type value, looked up by the raw string of the payload
+_FROM_DICT: Dict[str, Callable[[Dict[str, Any]], AudioMessage]] = {
+    message_type.value: AudioMessage.from_dict for message_type in MessageType
+}
+_FROM_DICT.update({
+    MessageType.AUDIO_REQUEST.value: AudioRequestMessage.from_dict,
+    MessageType.AUDIO_RESPONSE.value: AudioResponseMessage.from_dict,
+    MessageType.ERROR.value: ErrorMessage.from_dict,
+    MessageType.HEALTH_CHECK.value: HealthCheckMessage.from_dict,
+})
 
 
 class MessageParser:
@@ -220,36 +336,28 @@ class MessageParser:
     def parse_message(payload: Union[str, bytes]) -> AudioMessage:
         """Parse MQTT payload into appropriate message type."""
         
-        if isinstance(payload, bytes):
-            payload = payload.decode('utf-8')
-        
-        try:
-            data = json.loads(payload)
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON payload: {e}")
+        if isinstance(payload, bytes) and payload.startswith(FRAME_MAGIC):
+            data = decode_frame(payload)
+        else:
+            # orjson parses bytes directly, no decode to str first
+            try:
+                data = orjson.loads(payload)
+            except orjson.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON payload: {e}")
         
         message_type = data.get("message_type")
         if not message_type:
             raise ValueError("Missing message_type in payload")
         
+        # Route to appropriate message class
         try:
-            msg_type = MessageType(message_type)
-        except ValueError:
+            from_dict = _FROM_DICT[message_type]
+        except (KeyError, TypeError):
             raise ValueError(f"Unknown message type: {message_type}")
-        
-        # Route to appropriate message class
-        if msg_type == MessageType.AUDIO_REQUEST:
-            return AudioRequestMessage.from_dict(data)
-        elif msg_type == MessageType.AUDIO_RESPONSE:
-            return AudioResponseMessage.from_dict(data)
-        elif msg_type == MessageType.ERROR:
-            return ErrorMessage.from_dict(data)
-        elif msg_type == MessageType.HEALTH_CHECK:
-            return HealthCheckMessage.from_dict(data)
-        else:
-            return AudioMessage.from_dict(data)
+        return from_dict(data)
     
     @staticmethod
+    @lru_cache(maxsize=4096)
     def create_topic(device_id: str, message_type: MessageType, suffix: str = "") -> str:
         """Create MQTT topic for a device and message type."""
         base_topic = f"iot/{device_id}/{message_type.value}"
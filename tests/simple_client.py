@@ -12,13 +12,21 @@ import json
 import sys
 import time
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Union
 
 import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+try:
+    import uvloop
+except ImportError:  # Not available on Windows
+    uvloop = None
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.mqtt.asyncio_loop import AsyncioMQTTLoop
 from src.mqtt.messages import AudioRequestMessage, AudioResponseMessage, ErrorMessage, MessageParser, MessageType
 
 
@@ -29,8 +37,10 @@ class SimpleIoTClient:
         self.device_id = device_id
         self.broker_host = broker_host
         self.broker_port = broker_port
+        # MQTT v5 with a session that survives reconnects within one run
         self.client = mqtt.Client(
-            client_id=f"iot-client-{device_id}"
+            client_id=f"iot-client-{device_id}",
+            protocol=mqtt.MQTTv5
         )
         
         # Setup callbacks
@@ -39,43 +49,71 @@ class SimpleIoTClient:
         self.client.on_disconnect = self._on_disconnect
         
         # Topics
-        self.request_topic = f"iot/{device_id}/audio_request"
-        self.response_topic = f"iot/{device_id}/audio_response"
+        self.request_topic = MessageParser.create_topic(device_id, MessageType.AUDIO_REQUEST)
+        self.response_topic = MessageParser.create_topic(device_id, MessageType.AUDIO_RESPONSE)
         
         self.connected = False
         self.responses_received = 0
         self.error_received = False
         self.should_exit = False
+        # Session of the request being sent; responses for other sessions are ignored
+        self.session_id: Optional[str] = None
+        
+        # Callbacks run on the event loop, so plain asyncio events are enough
+        self._mqtt_loop: Optional[AsyncioMQTTLoop] = None
+        self._connected_event = asyncio.Event()
+        self._response_event = asyncio.Event()
     
-    def connect(self) -> None:
+    async def connect(self) -> None:
         """Connect to MQTT broker."""
         print(f"Connecting to MQTT broker at {self.broker_host}:{self.broker_port}")
-        self.client.connect(self.broker_host, self.broker_port, 60)
-        self.client.loop_start()
+        self._mqtt_loop = AsyncioMQTTLoop(self.client)
         
-        # Wait for connection
-        timeout = 10
-        start_time = time.time()
-        while not self.connected and (time.time() - start_time) < timeout:
-            time.sleep(0.1)
+        # Start from a clean session so responses queued for an earlier run are not
+        # replayed, but keep it across reconnects during this run
+        properties = Properties(PacketTypes.CONNECT)
+        properties.SessionExpiryInterval = 300
+        self.client.connect(
+            self.broker_host,
+            self.broker_port,
+            60,
+            clean_start=mqtt.MQTT_CLEAN_START_FIRST_ONLY,
+            properties=properties
+        )
+        self._mqtt_loop.start()
         
-        if not self.connected:
+        # Wait for connection
+        try:
+            await asyncio.wait_for(self._connected_event.wait(), timeout=10)
+        except asyncio.TimeoutError:
             raise ConnectionError("Failed to connect to MQTT broker")
     
-    def disconnect(self) -> None:
+    async def wait_for_response(self, timeout: float) -> bool:
+        """Wait until a response or error arrives. Returns False on timeout."""
+        try:
+            await asyncio.wait_for(self._response_event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    async def disconnect(self) -> None:
         """Disconnect from MQTT broker."""
-        self.client.loop_stop()
-        self.client.disconnect()
+        if self._mqtt_loop:
+            await self._mqtt_loop.disconnect()
     
     def _on_connect(self, client: mqtt.Client, userdata, flags, rc, properties=None) -> None:
         """Callback for connection."""
         if rc == 0:
             print(f"Device {self.device_id} connected successfully")
             self.connected = True
+            self._connected_event.set()
             
-            # Subscribe to response topic
-            client.subscribe(self.response_topic, qos=1)
-            print(f"Subscribed to {self.response_topic}")
+            # Subscribe to response topic unless the broker resumed our session
+            if flags.get("session present"):
+                print(f"Resumed session, still subscribed to {self.response_topic}")
+            else:
+                client.subscribe(self.response_topic, qos=1)
+                print(f"Subscribed to {self.response_topic}")
         else:
             print(f"Failed to connect with result code {rc}")
     
@@ -83,11 +121,15 @@ class SimpleIoTClient:
         """Callback for disconnection."""
         print(f"Device {self.device_id} disconnected")
         self.connected = False
+        self._connected_event.clear()
     
     def _on_message(self, client: mqtt.Client, userdata, msg: mqtt.MQTTMessage) -> None:
         """Handle incoming messages."""
         try:
             message = MessageParser.parse_message(msg.payload)
+            if message.session_id != self.session_id:
+                print(f"Ignoring message for session {message.session_id}")
+                return
             
             if message.message_type == MessageType.AUDIO_RESPONSE and isinstance(message, AudioResponseMessage):
                 self.responses_received += 1
@@ -95,6 +137,7 @@ class SimpleIoTClient:
                 print(f"Session ID: {message.session_id}")
                 print(f"Audio data size: {len(message.audio_data)} bytes")
                 print("----------------------------------------")
+                self._response_event.set()
                 
             elif message.message_type == MessageType.ERROR and isinstance(message, ErrorMessage):
                 print(f"\n--- Error Response ---")
@@ -106,12 +149,14 @@ class SimpleIoTClient:
                 self.error_received = True
                 self.should_exit = True
                 print("Error received - client will exit")
+                self._response_event.set()
                 
         except Exception as e:
             print(f"Error processing message: {e}")
     
-    def send_audio_chunk(self, audio_chunk: bytes, session_id: str) -> bool:
+    def send_audio_chunk(self, audio_chunk: Union[bytes, memoryview], session_id: str) -> bool:
         """Send a simplified audio chunk to the server."""
+        self.session_id = session_id
         
         # Create simplified audio request message
         request = AudioRequestMessage.create(
@@ -120,10 +165,10 @@ class SimpleIoTClient:
             session_id=session_id
         )
         
-        # Publish to request topic
+        # Publish to request topic as a binary frame (raw PCM16, no base64)
         result = self.client.publish(
             self.request_topic,
-            request.to_json(),
+            request.to_frame(),
             qos=1
         )
         
@@ -141,7 +186,22 @@ def convert_mp3_to_pcm16(mp3_data: bytes) -> bytes:
     In production, embedded devices would send PCM16 directly.
     """
     try:
-        # Try to use pydub if available (for development/testing)
+        # Prefer miniaudio: it decodes and resamples in-process, without an ffmpeg subprocess
+        import miniaudio
+        
+        decoded = miniaudio.decode(
+            mp3_data,
+            output_format=miniaudio.SampleFormat.SIGNED16,
+            nchannels=1,
+            sample_rate=24000
+        )
+        return decoded.samples.tobytes()
+        
+    except ImportError:
+        pass
+    
+    try:
+        # Fall back to pydub if available (for development/testing)
         from pydub import AudioSegment
         import io
         
@@ -158,12 +218,12 @@ def convert_mp3_to_pcm16(mp3_data: bytes) -> bytes:
         return audio_segment.raw_data
         
     except ImportError:
-        print("Warning: pydub not available for MP3 conversion. Using raw MP3 data.")
+        print("Warning: miniaudio/pydub not available for MP3 conversion. Using raw MP3 data.")
         print("Note: In production, embedded devices should send PCM16 directly.")
         return mp3_data
 
 
-def load_and_convert_audio(chunk_size: int = 8192) -> List[bytes]:
+def load_and_convert_audio(chunk_size: int = 8192) -> List[memoryview]:
     """
     Load the test.mp3 audio file, convert to PCM16, and split into chunks.
     This simulates what embedded devices would send (raw PCM16 chunks).
@@ -185,11 +245,9 @@ def load_and_convert_audio(chunk_size: int = 8192) -> List[bytes]:
     pcm16_data = convert_mp3_to_pcm16(mp3_data)
     print(f"Converted to PCM16 size: {len(pcm16_data)} bytes")
     
-    # Split into chunks
-    chunks = []
-    for i in range(0, len(pcm16_data), chunk_size):
-        chunk = pcm16_data[i:i + chunk_size]
-        chunks.append(chunk)
+    # Split into chunks: views of the PCM16 data, copied only into each frame
+    audio_view = memoryview(pcm16_data)
+    chunks = [audio_view[i:i + chunk_size] for i in range(0, len(pcm16_data), chunk_size)]
     
     print(f"Split PCM16 audio into {len(chunks)} chunks of ~{chunk_size} bytes each")
     return chunks
@@ -211,7 +269,7 @@ async def main():
     client = SimpleIoTClient(device_id, broker_host, broker_port)
     
     try:
-        client.connect()
+        await client.connect()
         
         # Load and convert test audio data to PCM16
         audio_chunks = load_and_convert_audio(chunk_size=8192)  # 8KB chunks
@@ -244,12 +302,7 @@ async def main():
             print("Waiting for response...")
             
             # Wait for response or error
-            timeout = 30
-            start_time = time.time()
-            while (not client.should_exit and 
-                   client.responses_received == 0 and 
-                   (time.time() - start_time) < timeout):
-                await asyncio.sleep(0.5)
+            await client.wait_for_response(timeout=30)
             
             if client.error_received:
                 print(f"\nError received - exiting immediately")
@@ -267,9 +320,10 @@ async def main():
         print(f"Error: {e}")
     finally:
         print("\nDisconnecting...")
-        client.disconnect()
+        await client.disconnect()
         print("Done.")
 
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop else None) as runner:
+        runner.run(main()) 
\ No newline at end of file